@@ -0,0 +1,183 @@
+"""图表共用的分析数据缓存
+
+散点图只读取评分、评论数两列到 NumPy 数组，在后台线程中读取和排序，不阻塞界面；
+饼图、柱状图读取由触发器维护的汇总表。结果在数据库变化前一直保留，切换选项卡不再查询数据库。
+"""
+import itertools
+import math
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, QObject, QThread, pyqtSignal
+
+from component.data_watcher import DataWatcher
+from component.db import connect, get_connection
+from component.schema import PRICE_BUCKET_LABELS
+
+MISSING = -1.5e308  # 读取时代替缺失或不是数值的评分
+
+
+class AnalyticsCache(QObject):
+    """分析数据缓存（单例），在界面线程中使用
+
+    数据库变化时标记全部结果过期，再次读取时重新计算；新结果与旧结果相同时返回原对象，
+    图表可以用 is 判断是否需要重绘。invalidated 在标记过期后发出，updated 在后台读取的新结果就绪后发出。
+    """
+    invalidated = pyqtSignal()
+    updated = pyqtSignal()
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.connection = get_connection()
+        self.values = {}  # 名称 -> 结果
+        self.stale = set()  # 已过期的名称
+        self.fingerprint = None  # 读取散点图数据时 phone_sales 的摘要
+        self.scatterWorker = None  # 正在读取散点图数据的线程
+        self.reloadScatter = False  # 读取完成后是否需要重新读取
+        self.scatterError = None  # 后台读取失败的错误信息，下次调用 scatterPoints 时抛出
+        DataWatcher.instance().dataChanged.connect(self.invalidate)
+        QCoreApplication.instance().aboutToQuit.connect(self.wait)
+
+    def invalidate(self):
+        self.stale.update(self.values)
+        self.invalidated.emit()
+
+    def brandSales(self):
+        """各品牌的 [(品牌, 销量)]"""
+        return self._get('brandSales', lambda: self.connection.execute(
+            "SELECT brand, total_sales FROM brand_summary ORDER BY brand"
+        ).fetchall())
+
+    def priceBucketSales(self):
+        """每个价格区间的销量总和，没有数据的区间为0"""
+        def load():
+            sales_by_price = [0] * len(PRICE_BUCKET_LABELS)
+            for bucket, total_sales in self.connection.execute("SELECT bucket, total_sales FROM price_bucket_summary"):
+                sales_by_price[bucket] = total_sales
+            return sales_by_price
+        return self._get('priceBucketSales', load)
+
+    def brandSalesTrend(self, max_points):
+        """[(品牌, 儒略日, 每天的销量增长)]，天数超过 max_points 时相邻若干天合并，取平均每天的增长"""
+        def load():
+            first, last = self.connection.execute(
+                "SELECT MIN(julianday(day)), MAX(julianday(day)) FROM brand_sales_daily"
+            ).fetchone()
+            if first is None:
+                return []
+            step = max(1, math.ceil((last - first + 1) / max_points))
+            return self.connection.execute("""
+                SELECT brand, AVG(julianday(day)), SUM(sales_change) * 1.0 / ?
+                FROM brand_sales_daily
+                GROUP BY brand, CAST((julianday(day) - ?) / ? AS INTEGER)
+                ORDER BY brand, 2
+            """, (step, first, step)).fetchall()
+        return self._get(('brandSalesTrend', max_points), load)
+
+    def scatterPoints(self):
+        """(评分, 评论数) 两个数组，按评论数排序
+
+        在后台线程读取，读取期间返回上次的结果（首次读取时为 None），完成后发出 updated。
+        """
+        if self.scatterError is not None:
+            message, self.scatterError = self.scatterError, None
+            raise RuntimeError(message)
+        if 'scatterPoints' not in self.values or 'scatterPoints' in self.stale:
+            self.stale.discard('scatterPoints')
+            self._loadScatter()
+        return self.values.get('scatterPoints')
+
+    def wait(self):
+        """等待后台读取结束，程序退出前调用"""
+        if self.scatterWorker is not None:
+            self.scatterWorker.wait()
+
+    def _get(self, name, load):
+        if name in self.values and name not in self.stale:
+            return self.values[name]
+        value = load()
+        if name not in self.values or value != self.values[name]:
+            self.values[name] = value
+        self.stale.discard(name)
+        return self.values[name]
+
+    def _loadScatter(self):
+        if self.scatterWorker is not None:
+            self.reloadScatter = True  # 正在读取的结果可能已过期，完成后再读取一次
+            return
+        self.reloadScatter = False
+        self.scatterWorker = ScatterWorker(self.fingerprint, self)
+        self.scatterWorker.loaded.connect(self._onScatterLoaded)
+        self.scatterWorker.loadFailed.connect(self._onScatterFailed)
+        self.scatterWorker.start()
+
+    def _finishScatter(self):
+        self.scatterWorker.wait()
+        self.scatterWorker = None
+        if self.reloadScatter:
+            self._loadScatter()
+
+    def _onScatterLoaded(self, fingerprint, points):
+        self._finishScatter()
+        # 摘要未变化时沿用已读取的数组，不发出 updated
+        if points is not None:
+            self.fingerprint = fingerprint
+            self.values['scatterPoints'] = points
+            self.updated.emit()
+
+    def _onScatterFailed(self, message):
+        self._finishScatter()
+        self.scatterError = message
+        self.updated.emit()
+
+
+def load_scatter_points(connection):
+    """读取评分、评论数，返回按评论数排序的 (评分, 评论数)
+
+    评分缺失或不是数值（如手工输入的文本）时为 NaN，评论数缺失或不是数值时按0处理。
+    """
+    cursor = connection.execute(f"""
+        SELECT CASE WHEN typeof(star) IN ('integer', 'real') THEN star ELSE {MISSING} END,
+               CASE WHEN typeof(comments_count) IN ('integer', 'real') THEN comments_count ELSE 0 END
+        FROM phone_sales
+    """)
+    values = np.fromiter(itertools.chain.from_iterable(cursor), dtype=np.float64).reshape(-1, 2)
+    stars = values[:, 0]
+    stars[stars == MISSING] = np.nan
+    comments = values[:, 1]
+    order = np.argsort(comments, kind='stable')
+    return stars[order], comments[order]
+
+
+class ScatterWorker(QThread):
+    """读取散点图数据的后台线程，使用独立的数据库连接
+
+    先计算 phone_sales 中评分、评论数的摘要（行数、最大 id 及两列之和），
+    与上次读取时相同则不再读取全表。
+    """
+    loaded = pyqtSignal(object, object)  # 摘要, 散点图数据（摘要未变化时为 None）
+    loadFailed = pyqtSignal(str)  # 错误信息
+
+    def __init__(self, fingerprint, parent=None):
+        super().__init__(parent)
+        self.fingerprint = fingerprint
+
+    def run(self):
+        connection = connect()
+        try:
+            fingerprint = connection.execute(
+                "SELECT COUNT(*), MAX(id), TOTAL(star), TOTAL(comments_count) FROM phone_sales"
+            ).fetchone()
+            points = load_scatter_points(connection) if fingerprint != self.fingerprint else None
+            self.loaded.emit(fingerprint, points)
+        except Exception as e:
+            self.loadFailed.emit(str(e))
+        finally:
+            connection.close()
@@ -0,0 +1,46 @@
+"""数据变化通知：定时检查 PRAGMA data_version，其他连接（如爬虫、导入线程）提交后通知界面刷新"""
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from component.db import get_connection
+
+
+class DataWatcher(QObject):
+    """数据变化通知（单例），在界面线程中使用
+
+    data_version 只在其他连接提交后变化，界面自身的修改需调用 notify()。
+    多次变化合并为一次：每个检查周期最多发出一次 dataChanged。
+    """
+    POLL_INTERVAL = 1000  # 检查间隔（毫秒），也是最高刷新频率
+
+    dataChanged = pyqtSignal()
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.connection = get_connection()
+        self.version = self._version()
+        self.pending = False  # 界面自身修改了数据，等待下次检查时通知
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(self.POLL_INTERVAL)
+
+    def notify(self):
+        """界面修改数据后调用，下次检查时发出 dataChanged"""
+        self.pending = True
+
+    def poll(self):
+        version = self._version()
+        if version != self.version or self.pending:
+            self.version = version
+            self.pending = False
+            self.dataChanged.emit()
+
+    def _version(self):
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
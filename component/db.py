@@ -0,0 +1,60 @@
+"""数据库访问层：统一解析数据库路径、设置连接参数，并按线程分配连接
+
+数据库路径取环境变量 PHONE_SALES_DB，未设置时为项目根目录下的 phone_sales.db，
+与程序从哪个目录启动无关；界面和爬虫因此读写同一个数据库。
+连接统一开启 WAL，界面读取与爬虫写入互不阻塞。
+"""
+import os
+import sqlite3
+import threading
+
+from component.schema import migrate
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.environ.get("PHONE_SALES_DB") or os.path.join(ROOT_DIR, "phone_sales.db")
+IMAGE_CACHE_DIR = os.environ.get("PHONE_SALES_IMAGE_CACHE") or os.path.join(ROOT_DIR, "image_cache")
+
+BUSY_TIMEOUT = 30  # 等待其他连接释放写锁的秒数
+PRAGMAS = [
+    "journal_mode = WAL",  # 读写并发，写入不阻塞读取
+    "synchronous = NORMAL",  # WAL 下提交无需每次 fsync，断电最多丢失最近的事务
+    "cache_size = -32000",  # 页缓存 32 MB
+    "mmap_size = 268435456",  # 256 MB 内存映射读取
+    "temp_store = MEMORY",
+]
+
+_local = threading.local()
+_migrated = set()  # 本进程中已升级过的数据库
+_migrateLock = threading.Lock()
+
+
+def connect(path=None):
+    """新建一个设置好参数的连接，本进程首次连接某个数据库时把它升级到最新版本
+
+    后台线程使用各自的连接，用完后自行关闭。
+    """
+    path = path or DB_PATH
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    for pragma in PRAGMAS:
+        connection.execute(f"PRAGMA {pragma}")
+    with _migrateLock:
+        if path not in _migrated:
+            migrate(connection)
+            _migrated.add(path)
+    return connection
+
+
+def get_connection():
+    """当前线程共用的连接（界面线程中的各窗口、选项卡共用一个），不要自行关闭"""
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        connection = _local.connection = connect()
+    return connection
+
+
+def close_connection():
+    """关闭当前线程共用的连接，程序退出前调用"""
+    connection = getattr(_local, "connection", None)
+    if connection is not None:
+        _local.connection = None
+        connection.close()
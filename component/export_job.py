@@ -0,0 +1,137 @@
+"""后台导出：按块从数据库读取并流式写入 Excel / CSV / Parquet（已安装 pyarrow 时），内存占用与行数无关"""
+import csv
+import importlib.util
+import os
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from component.db import connect
+from component.sales_model import HEADERS
+from component.schema import COLUMNS
+
+# 导出的字段及表头：界面上的各列之后附加商品 id 和链接，导入时按商品 id 去重
+EXPORT_COLUMNS = COLUMNS + ["item_id", "url"]
+EXPORT_HEADERS = HEADERS + ["商品id", "商品链接"]
+
+# pyarrow 是可选依赖，未安装时不提供 Parquet 格式
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+EXPORT_FILTERS = "Excel 文件 (*.xlsx);;CSV 文件 (*.csv)" + (";;Parquet 文件 (*.parquet)" if HAS_PYARROW else "")
+
+
+class XlsxWriter:
+    """openpyxl 只写模式，行数据直接写入临时文件，不在内存中保留工作表"""
+    def __init__(self, path):
+        from openpyxl import Workbook
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet()
+        self.sheet.append(EXPORT_HEADERS)
+
+    def write(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+class CsvWriter:
+    """CSV 文件（带 BOM，Excel 可直接打开）"""
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(EXPORT_HEADERS)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Parquet 文件，每块数据写成一个 row group（需要 pyarrow）"""
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("导出 Parquet 需要先安装 pyarrow")
+        self.pa = pa
+        types = {"price": pa.float64(), "sales": pa.int64(), "comments_count": pa.int64(), "star": pa.float64()}
+        self.schema = pa.schema([(header, types.get(column, pa.string()))
+                                 for header, column in zip(EXPORT_HEADERS, EXPORT_COLUMNS)])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema
+        ))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {".xlsx": XlsxWriter, ".csv": CsvWriter}
+if HAS_PYARROW:
+    WRITERS[".parquet"] = ParquetWriter
+
+
+class ExportWorker(QThread):
+    """导出线程，使用独立的数据库连接，每写完一块报告一次进度"""
+    CHUNK_SIZE = 5000
+
+    progressChanged = pyqtSignal(int, int)  # 已导出行数, 总行数
+    exportFinished = pyqtSignal(str)  # 导出文件路径
+    exportCancelled = pyqtSignal()
+    exportFailed = pyqtSignal(str)  # 错误信息
+
+    def __init__(self, db_path, file_path, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.file_path = file_path
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self):
+        writer = None
+        connection = connect(self.db_path)
+        try:
+            writer_class = WRITERS.get(os.path.splitext(self.file_path)[1].lower())
+            if writer_class is None:
+                raise RuntimeError("不支持的文件类型")
+            total = connection.execute("SELECT COUNT(*) FROM phone_sales").fetchone()[0]
+            self.progressChanged.emit(0, total)
+            writer = writer_class(self.file_path)
+            cursor = connection.execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM phone_sales ORDER BY id")
+            done = 0
+            while not self._cancelled.is_set():
+                rows = cursor.fetchmany(self.CHUNK_SIZE)
+                if not rows:
+                    break
+                writer.write(rows)
+                done += len(rows)
+                self.progressChanged.emit(done, total)
+            writer.close()
+            writer = None
+            if self._cancelled.is_set():
+                os.remove(self.file_path)
+                self.exportCancelled.emit()
+            else:
+                self.exportFinished.emit(self.file_path)
+        except Exception as e:
+            if writer is not None:
+                try:
+                    writer.close()
+                    os.remove(self.file_path)
+                except Exception:
+                    pass
+            self.exportFailed.emit(str(e))
+        finally:
+            connection.close()
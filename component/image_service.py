@@ -0,0 +1,257 @@
+"""图片加载服务
+
+后台线程下载图片，解码后的 QPixmap 保存在内存 LRU 中；原始数据按内容摘要保存在磁盘缓存，
+总大小超过上限时淘汰最久未访问的图片。表格中的缩略图缩小到 THUMBNAIL_SIZE 后单独缓存。
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QObject, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+from component.db import IMAGE_CACHE_DIR
+
+
+class DiskCache:
+    """按内容寻址的磁盘缓存
+
+    图片数据以内容的 sha256 为文件名保存，相同内容只存一份；
+    index.db 记录 key -> 摘要 以及每份数据的大小和最近访问时间。
+    """
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, digest TEXT NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS idx_blobs_accessed ON blobs (accessed)")
+
+    def get(self, key):
+        """读取 key 对应的数据，不存在返回 None"""
+        with self._lock:
+            row = self._connection.execute("SELECT digest FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._path(row[0]), "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+            with self._connection:
+                self._connection.execute("UPDATE blobs SET accessed = ? WHERE digest = ?", (time.time(), row[0]))
+            return data
+
+    def put(self, key, data):
+        """保存数据，并在超出容量时淘汰旧数据"""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            path = self._path(digest)
+            if not os.path.exists(path):
+                with open(path + ".tmp", "wb") as f:
+                    f.write(data)
+                os.replace(path + ".tmp", path)
+            with self._connection:
+                self._connection.execute(
+                    "INSERT INTO blobs (digest, size, accessed) VALUES (?, ?, ?) "
+                    "ON CONFLICT (digest) DO UPDATE SET accessed = excluded.accessed",
+                    (digest, len(data), time.time())
+                )
+                self._connection.execute("INSERT OR REPLACE INTO entries (key, digest) VALUES (?, ?)", (key, digest))
+            self._evict()
+
+    def _evict(self):
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 淘汰到上限的 90%，避免每次写入都触发淘汰
+        target = self.max_bytes * 0.9
+        cursor = self._connection.execute("SELECT digest, size FROM blobs ORDER BY accessed")
+        evicted = []
+        for digest, size in cursor:
+            if total <= target:
+                break
+            evicted.append((digest,))
+            total -= size
+        with self._connection:
+            self._connection.executemany("DELETE FROM entries WHERE digest = ?", evicted)
+            self._connection.executemany("DELETE FROM blobs WHERE digest = ?", evicted)
+        for (digest,) in evicted:
+            try:
+                os.remove(self._path(digest))
+            except OSError:
+                pass
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest)
+
+
+class ImageService(QObject):
+    """图片加载服务（单例），在界面线程中使用
+
+    request() 立即返回，图片就绪后发出 imageLoaded(url, QPixmap)，失败时发出 imageFailed(url, 错误信息)。
+    prefetchThumbnails() 只保留当前可见行的缩略图请求，就绪后发出 thumbnailLoaded(url, QPixmap)。
+    """
+    CACHE_DIR = IMAGE_CACHE_DIR  # 磁盘缓存目录
+    MEMORY_ITEMS = 64  # 内存中缓存的图片数
+    WORKERS = 4  # 同时下载的图片数
+    TIMEOUT = 10  # 下载超时（秒）
+    THUMBNAIL_SIZE = 64  # 缩略图边长
+    THUMBNAIL_ITEMS = 1024  # 内存中缓存的缩略图数
+    THUMBNAIL_WORKERS = 4  # 同时下载的缩略图数
+
+    imageLoaded = pyqtSignal(str, QPixmap)
+    imageFailed = pyqtSignal(str, str)
+    thumbnailLoaded = pyqtSignal(str, QPixmap)
+    _decoded = pyqtSignal(str, QImage, str)  # 后台线程 -> 界面线程
+    _thumbnailDecoded = pyqtSignal(str, QImage)
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.memory = OrderedDict()  # url -> QPixmap
+        self.pending = set()
+        self.disk = DiskCache(self.CACHE_DIR)
+        self.executor = ThreadPoolExecutor(max_workers=self.WORKERS)
+        self.thumbnails = OrderedDict()  # url -> 缩略图 QPixmap
+        self.thumbnailQueue = OrderedDict()  # 等待下载的缩略图 url（有序集合）
+        self.thumbnailRunning = set()
+        self.thumbnailFailed = set()  # 无法加载的缩略图，不再重试
+        self.thumbnailExecutor = ThreadPoolExecutor(max_workers=self.THUMBNAIL_WORKERS)
+        self._session = None
+        self._sessionLock = threading.Lock()
+        self._decoded.connect(self._onDecoded)
+        self._thumbnailDecoded.connect(self._onThumbnailDecoded)
+
+    def cached(self, url):
+        """内存中已有的图片，没有返回 None"""
+        pixmap = self.memory.get(url)
+        if pixmap is not None:
+            self.memory.move_to_end(url)
+        return pixmap
+
+    def request(self, url):
+        """在后台加载图片，已在内存中时直接发出 imageLoaded"""
+        pixmap = self.cached(url)
+        if pixmap is not None:
+            self.imageLoaded.emit(url, pixmap)
+        elif url not in self.pending:
+            self.pending.add(url)
+            self.executor.submit(self._load, url)
+
+    def session(self):
+        """复用连接（keep-alive）的 HTTP 会话，连接池大小与下载线程数一致（首次使用时才导入 requests）"""
+        with self._sessionLock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self.WORKERS + self.THUMBNAIL_WORKERS)
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+            return self._session
+
+    def thumbnail(self, url):
+        """内存中已有的缩略图，没有返回 None"""
+        pixmap = self.thumbnails.get(url)
+        if pixmap is not None:
+            self.thumbnails.move_to_end(url)
+        return pixmap
+
+    def prefetchThumbnails(self, urls):
+        """按顺序预取 urls 的缩略图，并取消不在其中、尚未开始的请求"""
+        self.thumbnailQueue.clear()
+        for url in urls:
+            if url not in self.thumbnails and url not in self.thumbnailRunning and url not in self.thumbnailFailed:
+                self.thumbnailQueue[url] = None
+        self._pumpThumbnails()
+
+    def _pumpThumbnails(self):
+        """在并发上限内启动排队的缩略图下载"""
+        while self.thumbnailQueue and len(self.thumbnailRunning) < self.THUMBNAIL_WORKERS:
+            url, _ = self.thumbnailQueue.popitem(last=False)
+            self.thumbnailRunning.add(url)
+            self.thumbnailExecutor.submit(self._loadThumbnail, url)
+
+    def _loadThumbnail(self, url):
+        """后台线程：读取或生成缩略图，磁盘上只保存缩小后的 PNG"""
+        key = f"{url}#thumbnail{self.THUMBNAIL_SIZE}"
+        image = QImage()
+        try:
+            data = self.disk.get(key)
+            if data is None or not image.loadFromData(data):
+                data = self.disk.get(url)
+                if data is None:
+                    response = self.session().get(url, timeout=self.TIMEOUT)
+                    data = response.content if response.status_code == 200 else b""
+                if image.loadFromData(data):
+                    image = image.scaled(self.THUMBNAIL_SIZE, self.THUMBNAIL_SIZE, Qt.KeepAspectRatio,
+                                         Qt.SmoothTransformation)
+                    png = QByteArray()
+                    buffer = QBuffer(png)
+                    buffer.open(QIODevice.WriteOnly)
+                    image.save(buffer, "PNG")
+                    self.disk.put(key, bytes(png))
+        except Exception:
+            image = QImage()
+        self._thumbnailDecoded.emit(url, image)
+
+    def _onThumbnailDecoded(self, url, image):
+        self.thumbnailRunning.discard(url)
+        if image.isNull():
+            self.thumbnailFailed.add(url)
+        else:
+            pixmap = QPixmap.fromImage(image)
+            self.thumbnails[url] = pixmap
+            while len(self.thumbnails) > self.THUMBNAIL_ITEMS:
+                self.thumbnails.popitem(last=False)
+            self.thumbnailLoaded.emit(url, pixmap)
+        self._pumpThumbnails()
+
+    def _load(self, url):
+        """后台线程：读磁盘缓存或下载，解码为 QImage"""
+        try:
+            data = self.disk.get(url)
+            from_disk = data is not None
+            if not from_disk:
+                response = self.session().get(url, timeout=self.TIMEOUT)
+                if response.status_code != 200:
+                    self._decoded.emit(url, QImage(), "无法下载图片")
+                    return
+                data = response.content
+            image = QImage()
+            if not image.loadFromData(data):
+                self._decoded.emit(url, QImage(), "图片加载失败")
+                return
+            if not from_disk:
+                self.disk.put(url, data)
+            self._decoded.emit(url, image, "")
+        except Exception as e:
+            self._decoded.emit(url, QImage(), f"图片加载失败: {e}")
+
+    def _onDecoded(self, url, image, error):
+        self.pending.discard(url)
+        if error:
+            self.imageFailed.emit(url, error)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.memory[url] = pixmap
+        while len(self.memory) > self.MEMORY_ITEMS:
+            self.memory.popitem(last=False)
+        self.imageLoaded.emit(url, pixmap)
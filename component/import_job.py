@@ -0,0 +1,210 @@
+"""批量导入：流式读取 CSV / Excel 文件，按爬虫相同的规则规范化、校验、去重后分批写入数据库
+
+用法：python -m component.import_job output.csv test.xlsx [--db phone_sales.db]
+"""
+import argparse
+import csv
+import math
+import os
+import re
+import time
+from collections import namedtuple
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from component.db import DB_PATH, connect
+from component.export_job import EXPORT_COLUMNS, EXPORT_HEADERS
+from component.sales_model import HEADERS
+from component.schema import COLUMNS, bulk_load, synthetic_item_id
+from spider.brand import classify_brand
+from spider.parser import item_id_from_url, parse_count
+from spider.sink import CSV_HEADER, UPSERT_SQL
+
+IMPORT_FILTERS = "数据文件 (*.csv *.xlsx);;CSV 文件 (*.csv);;Excel 文件 (*.xlsx)"
+BATCH_SIZE = 10000  # 每个事务写入的行数
+BULK_BYTES = 8 * 1024 * 1024  # 文件超过此大小时按 bulk_load 整体写入
+
+# 表头中可识别的列名（英文字段名、界面表头或导出文件的表头）
+FIELD_NAMES = dict(zip(COLUMNS, COLUMNS))
+FIELD_NAMES.update(zip(HEADERS, COLUMNS))
+FIELD_NAMES.update(zip(EXPORT_COLUMNS, EXPORT_COLUMNS))
+FIELD_NAMES.update(zip(EXPORT_HEADERS, EXPORT_COLUMNS))
+
+# 没有表头的旧版 output.csv，按列数确定各列含义（11 列、9 列为爬虫写入 CSV 的格式）
+LEGACY_LAYOUTS = {
+    11: CSV_HEADER,
+    10: COLUMNS,
+    9: CSV_HEADER[:9],  # 加入商品 id 和链接之前的爬虫 CSV
+    8: ['img', 'title', 'price', 'sales_text', 'sales', 'comments_count_text', 'comments_count', 'star'],
+}
+# 更早的爬虫写入的 9 列格式：没有店铺，销量文本写了两次（第 5、6 列相同）
+EARLY_LAYOUT = ['img', 'title', 'brand', 'price', 'sales_text', 'sales', 'comments_count_text', 'comments_count',
+                'star']
+
+ImportResult = namedtuple('ImportResult', 'imported duplicates invalid')
+
+
+def _text(value):
+    """单元格的值转为去掉首尾空白的文本，Excel 中的整数值不带小数部分"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _read_rows(path):
+    """逐行读取 CSV 或 Excel 文件，产生单元格列表"""
+    if os.path.splitext(path)[1].lower() == '.xlsx':
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                yield [_text(value) for value in row]
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from csv.reader(f)
+
+
+def read_records(path):
+    """读取文件中的记录，产生 {字段名: 文本} 字典
+
+    第一行全部是可识别的列名时按表头取值，否则按 LEGACY_LAYOUTS 中的列数对应关系取值
+    （9 列且第 5、6 列相同时按 EARLY_LAYOUT），列数不在其中的行产生 None（计为无效行）。
+    """
+    header = None
+    for index, row in enumerate(_read_rows(path)):
+        if index == 0 and row and all(value.strip() in FIELD_NAMES for value in row):
+            header = [FIELD_NAMES[value.strip()] for value in row]
+            continue
+        if not any(row):
+            continue
+        layout = header or LEGACY_LAYOUTS.get(len(row))
+        if header is None and len(row) == 9 and row[4] == row[5]:
+            layout = EARLY_LAYOUT
+        yield dict(zip(layout, row)) if layout else None
+
+
+def normalize_record(record):
+    """把一条记录规范化为 UPSERT_SQL 的参数，标题为空或价格无效时返回 None"""
+    title = record.get('title', '').strip()
+    if not title:
+        return None
+    price = record.get('price', '')
+    try:
+        price = float(price)
+    except ValueError:
+        try:
+            price = float(re.sub(r'[\s,¥￥]', '', price))
+        except ValueError:
+            return None
+    if not math.isfinite(price) or price <= 0:
+        return None
+
+    sales_text, sales = parse_count(record.get('sales_text') or record.get('sales', ''))
+    comments_count_text, comments_count = parse_count(
+        record.get('comments_count_text') or record.get('comments_count', '')
+    )
+    try:
+        star = float(record.get('star', ''))
+    except ValueError:
+        star = None
+    if star is not None and not 0 <= star <= 5:
+        star = None
+
+    url = record.get('url') or None
+    shopname = record.get('shopname') or None
+    item_id = (record.get('item_id') or (url and item_id_from_url(url))
+               or synthetic_item_id(title, shopname, price))
+    return (item_id, url, record.get('img') or None, title, record.get('brand') or classify_brand(title), price,
+            sales_text, int(sales) if sales else None, shopname, comments_count_text,
+            int(comments_count) if comments_count else None, star)
+
+
+def import_file(connection, path, batch_size=BATCH_SIZE, progress=None):
+    """把文件中的记录写入 phone_sales，返回 ImportResult
+
+    同一文件中商品 id 重复的记录只导入第一条；数据库中已有的商品原地更新。
+    小文件每 batch_size 行一个事务；大文件在 bulk_load 的单个事务中按 batch_size 分批写入，
+    最后统一重建全文索引和汇总表。progress(已读取的行数) 在每批写入后调用。
+    """
+    if os.path.getsize(path) >= BULK_BYTES:
+        with bulk_load(connection):
+            return _import_records(path, batch_size, progress, connection.executemany)
+
+    def executemany(sql, rows):
+        with connection:
+            connection.executemany(sql, rows)
+    return _import_records(path, batch_size, progress, executemany)
+
+
+def _import_records(path, batch_size, progress, executemany):
+    """读取、规范化、去重后每 batch_size 行调用一次 executemany(UPSERT_SQL, 行列表)"""
+    imported = duplicates = invalid = 0
+    seen = set()
+    batch = []
+
+    def write():
+        executemany(UPSERT_SQL, batch)
+        batch.clear()
+        if progress is not None:
+            progress(imported + duplicates + invalid)
+
+    for record in read_records(path):
+        row = normalize_record(record) if record is not None else None
+        if row is None:
+            invalid += 1
+            continue
+        if row[0] in seen:
+            duplicates += 1
+            continue
+        seen.add(row[0])
+        batch.append(row)
+        imported += 1
+        if len(batch) >= batch_size:
+            write()
+    if batch:
+        write()
+    return ImportResult(imported, duplicates, invalid)
+
+
+class ImportWorker(QThread):
+    """导入线程，使用独立的数据库连接"""
+    progressChanged = pyqtSignal(int)  # 已读取的行数
+    importFinished = pyqtSignal(object)  # ImportResult
+    importFailed = pyqtSignal(str)  # 错误信息
+
+    def __init__(self, db_path, file_path, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.file_path = file_path
+
+    def run(self):
+        connection = connect(self.db_path)
+        try:
+            result = import_file(connection, self.file_path, progress=self.progressChanged.emit)
+            self.importFinished.emit(result)
+        except Exception as e:
+            self.importFailed.emit(str(e))
+        finally:
+            connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='批量导入 CSV / Excel 文件到 phone_sales')
+    parser.add_argument('files', nargs='+', help='CSV 或 xlsx 文件')
+    parser.add_argument('--db', default=DB_PATH, help='数据库文件')
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help='每个事务写入的行数')
+    args = parser.parse_args()
+
+    connection = connect(args.db)
+    try:
+        for file_path in args.files:
+            start = time.perf_counter()
+            result = import_file(connection, file_path, args.batch)
+            print(f'{file_path}: 导入 {result.imported} 条，重复 {result.duplicates} 条，无效 {result.invalid} 条，'
+                  f'耗时 {time.perf_counter() - start:.1f} 秒')
+    finally:
+        connection.close()
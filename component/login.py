@@ -1,10 +1,12 @@
 import sys
-import sqlite3
+import time
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
     QRadioButton, QMessageBox, QButtonGroup, QDialog, QDesktopWidget
 )
 
+from component.db import close_connection, get_connection
+
 
 class RegisterDialog(QDialog):
     """注册界面"""
@@ -141,7 +143,7 @@ class LoginWidget(QWidget):
     def connectDB(self):
         """连接 SQLite 数据库"""
         try:
-            self.connection = sqlite3.connect("../phone_sales.db")  # 数据库文件
+            self.connection = get_connection()
             self.cursor = self.connection.cursor()
             # 如果表不存在，则创建表
             self.cursor.execute("""
@@ -186,8 +188,9 @@ class LoginWidget(QWidget):
 
     def open_main_window(self, is_admin):
         """打开主界面"""
+        started_at = time.perf_counter()  # 计时包含导入主界面模块的耗时
         from main import MainWindow  # 动态导入 MainWindow
-        self.main_window = MainWindow(is_admin)
+        self.main_window = MainWindow(is_admin, started_at)
         self.main_window.show()
         self.close()  # 关闭登录界面
 
@@ -202,14 +205,14 @@ class LoginWidget(QWidget):
         registerDialog.exec_()
 
     def closeEvent(self, event):
-        """关闭窗口时断开数据库连接"""
+        """关闭窗口时释放游标（连接由主界面继续使用）"""
         self.cursor.close()
-        self.connection.close()
         event.accept()
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(close_connection)
     window = LoginWidget()
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -1,196 +1,252 @@
+import os
 import sys
-import sqlite3
-import matplotlib.pyplot as plt
-import pandas as pd
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+import time
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import (
     QApplication, QTabWidget, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
     QRadioButton, QMessageBox, QButtonGroup, QDialog, QDesktopWidget, QTableWidget, QTableWidgetItem
 )
 
+from component.db import close_connection
 from component.phone_sales import PhoneSalesManager
+from component.schema import PRICE_BUCKET_LABELS
 
 
-class MarketShareTab(QWidget):
-    """市场占比-饼图选项卡"""
+class ChartTab(QWidget):
+    """图表选项卡基类，matplotlib 在创建时才导入
+
+    数据来自共用的 AnalyticsCache，数据库变化后缓存的结果与已绘制的数据不同时才重绘；
+    不可见的选项卡只做标记，切换过来时再刷新。
+    """
     def __init__(self):
         super().__init__()
+        self.data = None  # 已绘制的数据
+        self.dirty = False  # 隐藏期间数据库发生了变化
+        from component.analytics import AnalyticsCache  # 与 matplotlib 一样在创建图表时才导入 NumPy
+        self.cache = AnalyticsCache.instance()
         self.initUI()
         self.loadData()
+        self.cache.invalidated.connect(self.onDataChanged)
+        self.cache.updated.connect(self.onDataChanged)
 
     def initUI(self):
+        import matplotlib
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
         layout = QVBoxLayout()
 
+        # 设置中文字体
+        matplotlib.rcParams['font.sans-serif'] = ['SimHei']  # 设置中文字体
+        matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+
         # 创建 matplotlib 图形
-        self.figure, self.ax = plt.subplots()
+        self.figure = Figure()
+        self.ax = self.figure.add_subplot()
         self.canvas = FigureCanvas(self.figure)
 
-        # 设置中文字体
-        plt.rcParams['font.sans-serif'] = ['SimHei']  # 设置中文字体
-        plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-
         layout.addWidget(self.canvas)
         self.setLayout(layout)
 
+    def onDataChanged(self):
+        if self.isVisible():
+            self.loadData()
+        else:
+            self.dirty = True
+
+    def showEvent(self, event):
+        if self.dirty:
+            self.loadData()
+        super().showEvent(event)
+
     def loadData(self):
-        """从数据库加载数据并绘制饼图"""
+        """读取数据，与已绘制的数据不同时重绘"""
+        self.dirty = False
         try:
-            connection = sqlite3.connect("../phone_sales.db")
-            cursor = connection.cursor()
-            cursor.execute("SELECT brand, SUM(sales) FROM phone_sales GROUP BY brand")
-            data = cursor.fetchall()
+            data = self.queryData(self.cache)
+            if data is not self.data:
+                self.data = data
+                self.ax.clear()
+                self.draw(data)
+                self.canvas.draw_idle()
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"加载数据失败: {e}")
 
-            brands = [item[0] for item in data]
-            sales = [item[1] for item in data]
+    def queryData(self, cache):
+        """从 AnalyticsCache 读取绘图所需的数据"""
+        raise NotImplementedError
 
-            self.ax.clear()
-            self.ax.pie(sales, labels=brands, autopct="%1.1f%%", startangle=90)
-            self.ax.axis("equal")  # 保持圆形
-            self.canvas.draw()
+    def draw(self, data):
+        """在 self.ax 上绘图"""
+        raise NotImplementedError
 
-            connection.close()
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"加载数据失败: {e}")
 
+class MarketShareTab(ChartTab):
+    """市场占比-饼图选项卡"""
+    def queryData(self, cache):
+        return cache.brandSales()
 
-class SalesBarChartTab(QWidget):
-    """手机销量-柱状图选项卡"""
-    def __init__(self):
-        super().__init__()
-        self.initUI()
-        self.loadData()
+    def draw(self, data):
+        brands = [item[0] for item in data]
+        sales = [item[1] for item in data]
 
-    def initUI(self):
-        layout = QVBoxLayout()
+        self.ax.pie(sales, labels=brands, autopct="%1.1f%%", startangle=90)
+        self.ax.axis("equal")  # 保持圆形
 
-        # 创建 matplotlib 图形
-        self.figure, self.ax = plt.subplots()
-        self.canvas = FigureCanvas(self.figure)
 
-        # 设置中文字体
-        plt.rcParams['font.sans-serif'] = ['SimHei']  # 设置中文字体
-        plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+class SalesBarChartTab(ChartTab):
+    """手机销量-柱状图选项卡"""
+    def queryData(self, cache):
+        return cache.priceBucketSales()
 
-        layout.addWidget(self.canvas)
-        self.setLayout(layout)
+    def draw(self, data):
+        self.ax.bar(PRICE_BUCKET_LABELS, data, color='skyblue', width=0.5)
+        self.ax.tick_params(axis='x', labelrotation=90)
+        self.ax.set_xlabel("价格区间")
+        self.ax.set_ylabel("销量")
+        self.ax.set_title("价格区间与销量柱状图")
 
-    def loadData(self):
-        """从数据库加载数据并绘制柱状图"""
-        try:
-            connection = sqlite3.connect("../phone_sales.db")
-            cursor = connection.cursor()
-            cursor.execute("SELECT price, sales FROM phone_sales")
-            data = cursor.fetchall()
-
-            # 将价格划分为区间
-            price_bins = [0, 1000, 2000, 3000, 4000, 5000, float('inf')]  # 定义价格区间
-            price_labels = ['0-1000', '1000-2000', '2000-3000', '3000-4000', '4000-5000', '5000+']  # 定义区间标签
-
-            # 将价格数据分配到对应的区间
-            prices = [float(item[0]) for item in data]
-            sales = [int(item[1]) for item in data]
-            price_groups = pd.cut(prices, bins=price_bins, labels=price_labels)
-
-            # 计算每个价格区间的销量总和
-            sales_by_price = pd.Series(sales).groupby(price_groups).sum()
-
-            # 绘制柱状图
-            self.ax.clear()
-            sales_by_price.plot(kind='bar', color='skyblue', ax=self.ax)
-            self.ax.set_xlabel("价格区间")
-            self.ax.set_ylabel("销量")
-            self.ax.set_title("价格区间与销量柱状图")
-            self.canvas.draw()
-
-            connection.close()
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"加载数据失败: {e}")
 
+class CorrelationScatterTab(ChartTab):
+    """相关性分析-散点图选项卡，点数过多时改为六边形分箱的密度图"""
+    SCATTER_LIMIT = 20000  # 超过此点数时绘制密度图
+    GRID_SIZE = 50  # 密度图横向的六边形个数
 
-class CorrelationScatterTab(QWidget):
-    """相关性分析-散点图选项卡"""
     def __init__(self):
+        self.colorbar = None
         super().__init__()
-        self.initUI()
-        self.loadData()
 
     def initUI(self):
-        layout = QVBoxLayout()
-
-        # 创建 matplotlib 图形
-        self.figure, self.ax = plt.subplots()
-        self.canvas = FigureCanvas(self.figure)
-
-        # 设置中文字体
-        plt.rcParams['font.sans-serif'] = ['SimHei']  # 设置中文字体
-        plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-
-        layout.addWidget(self.canvas)
-        self.setLayout(layout)
-
-    def loadData(self):
-        """从数据库加载数据并绘制散点图"""
-        try:
-            connection = sqlite3.connect("../phone_sales.db")
-            cursor = connection.cursor()
-            # 查询评分和评论数
-            cursor.execute("SELECT star, comments_count FROM phone_sales")
-            data = cursor.fetchall()
-
-            # 提取评分和评论数，并将评论数转换为数字（异常值替换为0）
-            stars = []
-            comments = []
-            for item in data:
-                star = item[0]  # 评分
-                try:
-                    # 尝试将评论数转换为整数，失败则替换为0
-                    comment = int(item[1]) if item[1] else 0
-                except (ValueError, TypeError):
-                    comment = 0  # 如果转换失败，替换为0
-                stars.append(star)
-                comments.append(comment)
-
-            # 将评分和评论数组合成元组列表，并按评论数排序
-            combined = list(zip(stars, comments))
-            combined.sort(key=lambda x: x[1])  # 按评论数排序
-
-            # 分离排序后的评分和评论数
-            sorted_stars = [item[0] for item in combined]
-            sorted_comments = [item[1] for item in combined]
-
-            # 绘制散点图
-            self.ax.clear()
+        super().initUI()
+        # 数据在后台线程读取，首次读取完成前显示提示
+        self.ax.text(0.5, 0.5, "数据加载中...", ha="center", va="center", transform=self.ax.transAxes)
+
+    def queryData(self, cache):
+        """评分和评论数（缺失的评论数按0处理），按评论数排序；首次读取完成前为 None"""
+        return cache.scatterPoints()
+
+    def draw(self, data):
+        sorted_stars, sorted_comments = data
+        if len(sorted_stars) <= self.SCATTER_LIMIT:
+            if self.colorbar is not None:
+                # 坐标轴清空后无法单独移除颜色条，重新创建坐标轴
+                self.figure.clear()
+                self.ax = self.figure.add_subplot()
+                self.colorbar = None
             self.ax.scatter(sorted_stars, sorted_comments, color="red")
             self.ax.set_xlabel("评分")
             self.ax.set_ylabel("评论数")
             self.ax.set_title("评分与评论数相关性分析（评论数有序排列）")
-            self.canvas.draw()
+            return
+
+        import numpy as np
+
+        # 评论数跨越多个数量级，用对数坐标；加 1 使评论数为 0 的商品也能显示
+        valid = ~np.isnan(sorted_stars)
+        collection = self.ax.hexbin(sorted_stars[valid], sorted_comments[valid] + 1, gridsize=self.GRID_SIZE,
+                                    yscale="log", bins="log", mincnt=1, cmap="Reds")
+        if self.colorbar is None:
+            self.colorbar = self.figure.colorbar(collection, ax=self.ax, label="商品数")
+        else:
+            self.colorbar.update_normal(collection)
+        self.ax.set_xlabel("评分")
+        self.ax.set_ylabel("评论数 + 1（对数坐标）")
+        self.ax.set_title(f"评分与评论数密度分布（{valid.sum()} 个商品）")
+
+
+class SalesTrendTab(ChartTab):
+    """销量趋势-折线图选项卡：各品牌每天的销量增长（各商品相邻两次快照之差的和）"""
+    MAX_POINTS = 120  # 每个品牌最多绘制的点数，天数更多时相邻若干天合并为一个点
+    TOP_BRANDS = 6  # 只绘制销量增长最多的几个品牌
+
+    def queryData(self, cache):
+        return cache.brandSalesTrend(self.MAX_POINTS)
+
+    def draw(self, data):
+        import matplotlib.dates as mdates
+
+        velocity = {}
+        for brand, day, sales_change in data:
+            velocity.setdefault(brand, []).append((day, sales_change))
+        if not velocity:
+            self.ax.text(0.5, 0.5, "同一商品至少需要抓取两次", ha="center", va="center", transform=self.ax.transAxes)
+            return
+
+        # 只绘制总增长最多的几个品牌
+        top = sorted(velocity, key=lambda brand: sum(value for _, value in velocity[brand]),
+                     reverse=True)[:self.TOP_BRANDS]
+        for brand in top:
+            # 儒略日转为 matplotlib 日期（1970-01-01 起的天数）
+            self.ax.plot([day - 2440587.5 for day, _ in velocity[brand]], [value for _, value in velocity[brand]],
+                         marker=".", label=brand)
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter("%m-%d"))
+        self.ax.axhline(0, color="grey", linewidth=0.5)
+        self.ax.set_xlabel("日期")
+        self.ax.set_ylabel("销量增长（每天）")
+        self.ax.set_title("品牌销量速度趋势")
+        self.ax.legend()
+
+
+class LazyTab(QWidget):
+    """选项卡占位，首次显示时才创建真正的内容"""
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+        self.content = None
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
 
-            connection.close()
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"加载数据失败: {e}")
+    def ensureLoaded(self):
+        """创建内容（只创建一次）"""
+        if self.content is None:
+            self.content = self.factory()
+            self.layout().addWidget(self.content)
+        return self.content
+
+    def showEvent(self, event):
+        self.ensureLoaded()
+        super().showEvent(event)
 
 
 class MainWindow(QTabWidget):
     """主窗口"""
-    def __init__(self, is_admin):
+    STARTUP_BUDGET_MS = 1000  # 从打开主界面到可交互的耗时预算（毫秒）
+    # 设置环境变量 PHONE_SALES_STARTUP_REPORT=1 时输出启动耗时
+    REPORT_STARTUP = bool(os.environ.get("PHONE_SALES_STARTUP_REPORT"))
+
+    def __init__(self, is_admin, started_at=None):
         super().__init__()
         self.is_admin = is_admin  # 是否是管理员
+        self.startedAt = started_at if started_at is not None else time.perf_counter()
         self.initUI()
+        if self.REPORT_STARTUP:
+            # 事件循环处理完首次显示后即视为可交互
+            QTimer.singleShot(0, self.reportStartup)
 
     def initUI(self):
         self.setWindowTitle("手机销售数据分析")
         self.setGeometry(100, 100, 800, 600)
 
-        # 添加选项卡
-        self.addTab(PhoneSalesManager(self.is_admin), "手机销售数据")
-        self.addTab(MarketShareTab(), "市场占比-饼图")
-        self.addTab(SalesBarChartTab(), "手机销量-柱状图")
-        self.addTab(CorrelationScatterTab(), "相关性分析-散点图")
+        # 添加选项卡，切换到该选项卡时才创建并加载数据
+        self.addTab(LazyTab(lambda: PhoneSalesManager(self.is_admin)), "手机销售数据")
+        self.addTab(LazyTab(MarketShareTab), "市场占比-饼图")
+        self.addTab(LazyTab(SalesBarChartTab), "手机销量-柱状图")
+        self.addTab(LazyTab(CorrelationScatterTab), "相关性分析-散点图")
+        self.addTab(LazyTab(SalesTrendTab), "销量趋势-折线图")
+
+    def reportStartup(self):
+        """输出主界面可交互耗时，超出预算时提示"""
+        elapsed = (time.perf_counter() - self.startedAt) * 1000
+        print(f"主界面可交互耗时: {elapsed:.0f} ms（预算 {self.STARTUP_BUDGET_MS} ms）")
+        if elapsed > self.STARTUP_BUDGET_MS:
+            print("警告: 主界面启动耗时超出预算")
 
 
 if __name__ == "__main__":
+    started_at = time.perf_counter()
     app = QApplication(sys.argv)
-    window = MainWindow(is_admin=True)  # 默认以管理员身份打开
+    app.aboutToQuit.connect(close_connection)
+    window = MainWindow(is_admin=True, started_at=started_at)  # 默认以管理员身份打开
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -1,14 +1,43 @@
+import math
+import os
 import sys
-import sqlite3
-import pandas as pd  # 导入 pandas 库
-import requests
-from PyQt5.QtCore import QByteArray, Qt
-from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import Qt, QLocale, QSize, QTimer
+from PyQt5.QtGui import QDoubleValidator
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
-    QPushButton, QLineEdit, QMessageBox, QInputDialog, QFileDialog, QDialog, QFormLayout, QLabel
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QTableView, QAbstractItemView, QCheckBox,
+    QPushButton, QLineEdit, QMessageBox, QInputDialog, QFileDialog, QDialog, QFormLayout, QLabel,
+    QProgressDialog
 )
 
+from component.data_watcher import DataWatcher
+from component.db import DB_PATH, close_connection, get_connection
+from component.export_job import EXPORT_FILTERS, WRITERS, ExportWorker
+from component.image_service import ImageService
+from component.import_job import IMPORT_FILTERS, ImportWorker
+from component.sales_model import HEADERS, PhoneSalesModel
+from component.schema import COLUMNS
+from component.search import SearchWorker
+from spider.parser import parse_count
+
+
+def convert_field(column, text):
+    """把输入的文本转换为 column 列的值：销量、评论数按爬虫的规则取数字（如 6万+），
+    价格须为正数，评分须在 0 到 5 之间，格式不正确时抛出 ValueError"""
+    if column in ("sales", "comments_count"):
+        _, digits = parse_count(text)
+        if digits:
+            return int(digits)
+    elif column in ("price", "star"):
+        try:
+            value = float(text)
+        except ValueError:
+            value = math.nan
+        if column == "price" and math.isfinite(value) and value > 0 or column == "star" and 0 <= value <= 5:
+            return value
+    else:
+        return text
+    raise ValueError(f"{HEADERS[COLUMNS.index(column)]}格式不正确: {text}")
+
 
 class DetailDialog(QDialog):
     """查看详情对话框"""
@@ -21,42 +50,21 @@ class DetailDialog(QDialog):
         layout = QVBoxLayout()
 
         # 图片地址
-        img_url = data[0]  # 第一个字段是图片地址
-        if img_url == "无":
-            # 如果图片地址为“无”，显示文本
-            no_image_label = QLabel("无图片")
-            no_image_label.setAlignment(Qt.AlignCenter)  # 居中显示
-            layout.addWidget(no_image_label)
+        self.imgUrl = data[0].strip()  # 第一个字段是图片地址，为空表示没有图片
+        self.imageLabel = QLabel()
+        self.imageLabel.setAlignment(Qt.AlignCenter)  # 居中显示
+        self.imageLabel.setMinimumHeight(300)
+        layout.addWidget(self.imageLabel)
+        if self.imgUrl in ("", "无"):
+            # 如果图片地址为空或“无”，显示文本
+            self.imageLabel.setText("无图片")
         else:
-            # 尝试从互联网加载图片
-            try:
-                # 使用 requests 下载图片
-                response = requests.get(img_url)
-                if response.status_code == 200:
-                    # 将图片数据加载到 QPixmap
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(QByteArray(response.content))
-                    if pixmap.isNull():
-                        # 如果图片加载失败，显示错误信息
-                        error_label = QLabel("图片加载失败")
-                        error_label.setAlignment(Qt.AlignCenter)
-                        layout.addWidget(error_label)
-                    else:
-                        # 显示图片
-                        image_label = QLabel()
-                        image_label.setPixmap(pixmap.scaled(300, 300, Qt.KeepAspectRatio))  # 缩放图片
-                        image_label.setAlignment(Qt.AlignCenter)
-                        layout.addWidget(image_label)
-                else:
-                    # 如果请求失败，显示错误信息
-                    error_label = QLabel("无法下载图片")
-                    error_label.setAlignment(Qt.AlignCenter)
-                    layout.addWidget(error_label)
-            except Exception as e:
-                # 如果发生异常，显示错误信息
-                error_label = QLabel(f"图片加载失败: {str(e)}")
-                error_label.setAlignment(Qt.AlignCenter)
-                layout.addWidget(error_label)
+            # 先显示占位文字，图片在后台下载（或从缓存读取）完成后替换
+            self.imageLabel.setText("图片加载中...")
+            self.imageService = ImageService.instance()
+            self.imageService.imageLoaded.connect(self.onImageLoaded)
+            self.imageService.imageFailed.connect(self.onImageFailed)
+            self.imageService.request(self.imgUrl)
 
         # 字段名称
         fields = [
@@ -72,13 +80,36 @@ class DetailDialog(QDialog):
         layout.addLayout(form_layout)
         self.setLayout(layout)
 
+    def onImageLoaded(self, url, pixmap):
+        """图片就绪，显示缩放后的图片"""
+        if url == self.imgUrl:
+            self.imageLabel.setPixmap(pixmap.scaled(300, 300, Qt.KeepAspectRatio))  # 缩放图片
+
+    def onImageFailed(self, url, message):
+        """图片加载失败，显示错误信息"""
+        if url == self.imgUrl:
+            self.imageLabel.setText(message)
+
+    def done(self, result):
+        """关闭对话框时不再接收图片加载结果"""
+        if self.imgUrl not in ("", "无"):
+            self.imageService.imageLoaded.disconnect(self.onImageLoaded)
+            self.imageService.imageFailed.disconnect(self.onImageFailed)
+        super().done(result)
+
 
 class PhoneSalesManager(QWidget):
+    SEARCH_DELAY = 300  # 输入停止多少毫秒后开始搜索
+    PREFETCH_DELAY = 50  # 滚动停止多少毫秒后预取可见行的缩略图
+
     def __init__(self, is_admin):
         super().__init__()
         self.is_admin = is_admin  # 是否是管理员
+        self.importWorker = None  # 正在执行的导入任务
+        self.exportWorker = None  # 正在执行的导出任务
         self.initUI()
         self.connectDB()
+        self.initSearch()
         self.loadData()
 
     def initUI(self):
@@ -98,6 +129,13 @@ class PhoneSalesManager(QWidget):
         self.minPriceInput.setPlaceholderText("最小价格")
         self.maxPriceInput = QLineEdit(self)  # 新增最大价格输入框
         self.maxPriceInput.setPlaceholderText("最大价格")
+        # 按 C 区域设置校验（小数点为“.”、不接受千位分隔符），与 float() 的格式一致
+        priceLocale = QLocale.c()
+        priceLocale.setNumberOptions(QLocale.RejectGroupSeparator)
+        for priceInput in (self.minPriceInput, self.maxPriceInput):
+            priceValidator = QDoubleValidator(0, 1e9, 2, priceInput)
+            priceValidator.setLocale(priceLocale)
+            priceInput.setValidator(priceValidator)
         searchButton = QPushButton("搜索", self)
         searchButton.clicked.connect(self.searchData)
         searchLayout.addWidget(self.searchInput)
@@ -105,14 +143,16 @@ class PhoneSalesManager(QWidget):
         searchLayout.addWidget(self.minPriceInput)  # 添加最小价格输入框
         searchLayout.addWidget(self.maxPriceInput)  # 添加最大价格输入框
         searchLayout.addWidget(searchButton)
+        self.thumbnailCheckBox = QCheckBox("显示缩略图", self)
+        self.thumbnailCheckBox.toggled.connect(self.toggleThumbnails)
+        searchLayout.addWidget(self.thumbnailCheckBox)
         layout.addLayout(searchLayout)
 
-        # 表格
-        self.table = QTableWidget(self)
-        self.table.setColumnCount(10)
-        self.table.setHorizontalHeaderLabels(
-            ["图片地址", "标题", "品牌", "价格", "销量_文本", "销量", "店铺名称", "评论数_字符", "评论数", "评分"]
-        )
+        # 表格（模型在连接数据库后设置）
+        self.table = QTableView(self)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table.verticalHeader().setDefaultSectionSize(24)
         layout.addWidget(self.table)
 
         # 如果是管理员，显示按钮；否则隐藏
@@ -123,109 +163,142 @@ class PhoneSalesManager(QWidget):
             self.deleteButton = QPushButton("删除", self)
             self.updateButton = QPushButton("修改", self)
             self.detailButton = QPushButton("查看详情", self)
-            self.exportButton = QPushButton("导出为 Excel", self)
+            self.importButton = QPushButton("导入数据", self)
+            self.exportButton = QPushButton("导出数据", self)
             self.buttonLayout.addWidget(self.addButton)
             self.buttonLayout.addWidget(self.deleteButton)
             self.buttonLayout.addWidget(self.updateButton)
             self.buttonLayout.addWidget(self.detailButton)
+            self.buttonLayout.addWidget(self.importButton)
             self.buttonLayout.addWidget(self.exportButton)
             self.addButton.clicked.connect(self.addData)
             self.deleteButton.clicked.connect(self.deleteData)
             self.updateButton.clicked.connect(self.updateData)
+            self.importButton.clicked.connect(self.importData)
         else:
             self.buttonLayout = QHBoxLayout()
             self.detailButton = QPushButton("查看详情", self)
-            self.exportButton = QPushButton("导出为 Excel", self)
+            self.exportButton = QPushButton("导出数据", self)
             self.buttonLayout.addWidget(self.detailButton)
             self.buttonLayout.addWidget(self.exportButton)
 
         layout.addLayout(self.buttonLayout)
         self.setLayout(layout)
         self.detailButton.clicked.connect(self.showDetail)
-        self.exportButton.clicked.connect(self.exportToExcel)
+        self.exportButton.clicked.connect(self.exportData)
 
     def connectDB(self):
-        """连接 SQLite 数据库"""
+        """连接 SQLite 数据库（界面线程共用的连接，首次连接时升级到最新结构）"""
         try:
-            self.connection = sqlite3.connect("../phone_sales.db")  # 数据库文件
+            self.connection = get_connection()
             self.cursor = self.connection.cursor()
-            # 如果表不存在，则创建表
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS phone_sales (
-                    img TEXT,
-                    title TEXT NOT NULL,
-                    brand TEXT,
-                    price TEXT,
-                    sales_text TEXT,
-                    sales TEXT,
-                    shopname TEXT,
-                    comments_count_text TEXT,
-                    comments_count TEXT,
-                    star TEXT
-                )
-            """)
-            self.connection.commit()
+            self.model = PhoneSalesModel(self.connection, self)
+            self.table.setModel(self.model)
+            self.initThumbnails()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"数据库连接失败: {e}")
             sys.exit()
 
+    def initThumbnails(self):
+        """缩略图列：只预取当前可见行的缩略图，滚动时取消已不可见行的请求"""
+        self.imageService = None
+        self.prefetchTimer = QTimer(self)
+        self.prefetchTimer.setSingleShot(True)
+        self.prefetchTimer.setInterval(self.PREFETCH_DELAY)
+        self.prefetchTimer.timeout.connect(self.prefetchThumbnails)
+        self.table.verticalScrollBar().valueChanged.connect(self.schedulePrefetch)
+        self.model.modelReset.connect(self.schedulePrefetch)
+        self.model.rowsInserted.connect(self.schedulePrefetch)
+
+    def toggleThumbnails(self, checked):
+        """显示或隐藏缩略图列"""
+        if self.imageService is None:
+            self.imageService = ImageService.instance()
+            self.imageService.thumbnailLoaded.connect(self.model.thumbnailReady)
+        size = ImageService.THUMBNAIL_SIZE
+        if checked:
+            self.table.setIconSize(QSize(size, size))
+            self.table.verticalHeader().setDefaultSectionSize(size + 4)
+            self.model.setThumbnailProvider(self.imageService.thumbnail)
+        else:
+            self.table.verticalHeader().setDefaultSectionSize(24)
+            self.model.setThumbnailProvider(None)
+            self.imageService.prefetchThumbnails([])
+
+    def schedulePrefetch(self):
+        if self.model.thumbnailProvider is not None:
+            self.prefetchTimer.start()
+
+    def prefetchThumbnails(self):
+        """预取可见行的缩略图"""
+        if self.model.thumbnailProvider is None:
+            return
+        first = self.table.rowAt(0)
+        if first == -1:
+            self.imageService.prefetchThumbnails([])
+            return
+        last = self.table.rowAt(self.table.viewport().height() - 1)
+        if last == -1:
+            last = self.model.rowCount() - 1
+        urls = [self.model.imageUrl(row) for row in range(first, last + 1)]
+        self.imageService.prefetchThumbnails([url for url in urls if url])
+
+    def initSearch(self):
+        """边输入边搜索：输入防抖后交给后台线程查询"""
+        self.searchGeneration = 0
+        self.searchWorker = SearchWorker(DB_PATH, self)
+        self.searchWorker.resultsReady.connect(self.onSearchFinished)
+        self.searchWorker.searchFailed.connect(self.onSearchFailed)
+        self.searchWorker.start()
+        QApplication.instance().aboutToQuit.connect(self.searchWorker.stop)
+
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(self.SEARCH_DELAY)
+        self.searchTimer.timeout.connect(self.searchData)
+        for searchInput in (self.searchInput, self.brandInput, self.minPriceInput, self.maxPriceInput):
+            searchInput.textChanged.connect(self.scheduleSearch)
+            searchInput.returnPressed.connect(self.searchData)
+
+    def scheduleSearch(self):
+        """输入变化时重新计时，停止输入 SEARCH_DELAY 毫秒后才搜索"""
+        self.searchTimer.start()
+
     def loadData(self):
-        """加载数据到表格"""
+        """加载数据到表格（由模型分块懒加载）"""
         try:
-            self.cursor.execute("SELECT * FROM phone_sales")
-            phones = self.cursor.fetchall()
-
-            self.table.setRowCount(0)
-            for row, phone in enumerate(phones):
-                self.table.insertRow(row)
-                for col, value in enumerate(phone):
-                    self.table.setItem(row, col, QTableWidgetItem(str(value)))
+            self.model.setQuery()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"加载数据失败: {e}")
 
     def searchData(self):
-        """条件搜索：按标题、品牌、价格区间搜索"""
+        """条件搜索：按标题、品牌、价格区间搜索（后台执行）"""
+        self.searchTimer.stop()
         # 获取搜索条件
         title = self.searchInput.text().strip()
         brand = self.brandInput.text().strip()
-        min_price = self.minPriceInput.text().strip()  # 最小价格
-        max_price = self.maxPriceInput.text().strip()  # 最大价格
+        # 未输入完整的价格（如“.”、“1e”）不作为条件
+        min_price = self.minPriceInput.text().strip() if self.minPriceInput.hasAcceptableInput() else ""  # 最小价格
+        max_price = self.maxPriceInput.text().strip() if self.maxPriceInput.hasAcceptableInput() else ""  # 最大价格
 
         # 如果没有输入任何条件，则加载全部数据
         if not title and not brand and not min_price and not max_price:
+            self.searchGeneration = self.searchWorker.cancel()
             self.loadData()
             return
 
-        try:
-            # 动态构建 SQL 查询
-            query = "SELECT * FROM phone_sales WHERE 1=1"
-            params = []
-
-            if title:
-                query += " AND title LIKE ?"
-                params.append(f"%{title}%")
-            if brand:
-                query += " AND brand LIKE ?"
-                params.append(f"%{brand}%")
-            if min_price:
-                query += " AND CAST(price AS REAL) >= ?"
-                params.append(float(min_price))
-            if max_price:
-                query += " AND CAST(price AS REAL) <= ?"
-                params.append(float(max_price))
-
-            # 执行查询
-            self.cursor.execute(query, params)
-            phones = self.cursor.fetchall()
-
-            # 更新表格数据
-            self.table.setRowCount(0)
-            for row, phone in enumerate(phones):
-                self.table.insertRow(row)
-                for col, value in enumerate(phone):
-                    self.table.setItem(row, col, QTableWidgetItem(str(value)))
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"搜索失败: {e}")
+        # 标题关键词走全文索引并按相关度排序，结果由 onSearchFinished 交付
+        self.searchGeneration = self.searchWorker.submit(title, brand, min_price, max_price)
+
+    def onSearchFinished(self, generation, ids):
+        """后台搜索完成，只显示最新一次请求的结果"""
+        if generation == self.searchGeneration:
+            self.model.setRowIds(ids)
+
+    def onSearchFailed(self, generation, message):
+        """后台搜索失败"""
+        if generation == self.searchGeneration:
+            QMessageBox.critical(self, "错误", f"搜索失败: {message}")
 
     def addData(self):
         """添加数据"""
@@ -269,48 +342,64 @@ class PhoneSalesManager(QWidget):
         if not ok or not star:
             return
 
+        try:
+            values = [convert_field(column, value) for column, value in zip(COLUMNS, (
+                img, title, brand, price, sales_text, sales, shopname, comments_count_text, comments_count, star))]
+        except ValueError as e:
+            QMessageBox.warning(self, "警告", str(e))
+            return
+
         try:
             self.cursor.execute(
                 "INSERT INTO phone_sales (img, title, brand, price, sales_text, sales, shopname, comments_count_text, comments_count, star) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                (img, title, brand, price, sales_text, sales, shopname, comments_count_text, comments_count, star)
+                values
             )
             self.connection.commit()
-            self.loadData()
+            if self.model.searchResults:
+                self.searchData()  # 重新搜索，新数据符合条件时才显示
+            else:
+                self.model.appendRowId(self.cursor.lastrowid)
+            DataWatcher.instance().notify()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"添加失败: {e}")
 
+    def selectedRowIds(self):
+        """选中各行的 id，按行号排序"""
+        rows = sorted(index.row() for index in self.table.selectionModel().selectedRows())
+        return [self.model.rowId(row) for row in rows]
+
     def deleteData(self):
-        """删除数据"""
-        selectedRow = self.table.currentRow()
-        if selectedRow == -1:
+        """删除选中的数据（可多选），在一个事务中执行"""
+        ids = self.selectedRowIds()
+        if not ids:
             QMessageBox.warning(self, "警告", "请选择要删除的行")
             return
+        if len(ids) > 1 and QMessageBox.question(
+                self, "确认", f"确定删除选中的 {len(ids)} 条数据？") != QMessageBox.Yes:
+            return
 
-        title = self.table.item(selectedRow, 1).text()
         try:
-            self.cursor.execute("DELETE FROM phone_sales WHERE title = ?", (title,))
-            self.connection.commit()
-            self.loadData()
+            with self.connection:
+                self.cursor.executemany("DELETE FROM phone_sales WHERE id = ?", [(rowid,) for rowid in ids])
+            self.model.removeRowIds(ids)
+            DataWatcher.instance().notify()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"删除失败: {e}")
 
     def updateData(self):
-        """修改数据"""
-        selectedRow = self.table.currentRow()
-        if selectedRow == -1:
+        """修改数据：选中一行时逐项修改，选中多行时批量修改同一字段"""
+        ids = self.selectedRowIds()
+        if not ids:
             QMessageBox.warning(self, "警告", "请选择要修改的行")
             return
+        if len(ids) > 1:
+            self.updateField(ids)
+            return
 
-        img = self.table.item(selectedRow, 0).text()
-        title = self.table.item(selectedRow, 1).text()
-        brand = self.table.item(selectedRow, 2).text()
-        price = self.table.item(selectedRow, 3).text()
-        sales_text = self.table.item(selectedRow, 4).text()
-        sales = self.table.item(selectedRow, 5).text()
-        shopname = self.table.item(selectedRow, 6).text()
-        comments_count_text = self.table.item(selectedRow, 7).text()
-        comments_count = self.table.item(selectedRow, 8).text()
-        star = self.table.item(selectedRow, 9).text()
+        rowid = ids[0]
+        selectedRow = self.table.selectionModel().selectedRows()[0].row()
+        (img, title, brand, price, sales_text, sales, shopname, comments_count_text, comments_count,
+         star) = self.model.rowData(selectedRow)
 
         img, ok = QInputDialog.getText(self, "修改手机销售数据", "图片地址:", text=img)
         if not ok or not img:
@@ -352,62 +441,163 @@ class PhoneSalesManager(QWidget):
         if not ok or not star:
             return
 
+        try:
+            values = [convert_field(column, value) for column, value in zip(COLUMNS, (
+                img, title, brand, price, sales_text, sales, shopname, comments_count_text, comments_count, star))]
+        except ValueError as e:
+            QMessageBox.warning(self, "警告", str(e))
+            return
+
         try:
             self.cursor.execute(
-                "UPDATE phone_sales SET img = ?, title = ?, brand = ?, price = ?, sales_text = ?, sales = ?, shopname = ?, comments_count_text = ?, comments_count = ?, star = ? WHERE title = ?",
-                (img, title, brand, price, sales_text, sales, shopname, comments_count_text, comments_count, star, title)
+                "UPDATE phone_sales SET img = ?, title = ?, brand = ?, price = ?, sales_text = ?, sales = ?, shopname = ?, comments_count_text = ?, comments_count = ?, star = ? WHERE id = ?",
+                (*values, rowid)
             )
             self.connection.commit()
-            self.loadData()
+            self.model.refreshRowId(rowid)
+            DataWatcher.instance().notify()
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"修改失败: {e}")
+
+    def updateField(self, ids):
+        """把选中各行的同一字段改为相同的值（如批量修改品牌），在一个事务中执行"""
+        header, ok = QInputDialog.getItem(self, "批量修改", f"已选中 {len(ids)} 条数据，要修改的字段:", HEADERS,
+                                          HEADERS.index("品牌"), False)
+        if not ok:
+            return
+        value, ok = QInputDialog.getText(self, "批量修改", f"{header}:")
+        if not ok or not value:
+            return
+
+        column = COLUMNS[HEADERS.index(header)]
+        try:
+            value = convert_field(column, value)
+        except ValueError as e:
+            QMessageBox.warning(self, "警告", str(e))
+            return
+
+        try:
+            with self.connection:
+                self.cursor.executemany(f"UPDATE phone_sales SET {column} = ? WHERE id = ?",
+                                        [(value, rowid) for rowid in ids])
+            for rowid in ids:
+                self.model.refreshRowId(rowid)
+            DataWatcher.instance().notify()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"修改失败: {e}")
 
     def showDetail(self):
         """查看详情"""
-        selectedRow = self.table.currentRow()
+        selectedRow = self.table.currentIndex().row()
         if selectedRow == -1:
             QMessageBox.warning(self, "警告", "请选择要查看的行")
             return
 
         # 获取选中行的数据
-        data = []
-        for col in range(self.table.columnCount()):
-            data.append(self.table.item(selectedRow, col).text())
+        data = self.model.rowData(selectedRow)
 
         # 弹出详情对话框
         detailDialog = DetailDialog(data, self)
         detailDialog.exec_()
 
-    def exportToExcel(self):
-        """导出数据为 Excel 文件"""
-        try:
-            # 从数据库加载数据
-            self.cursor.execute("SELECT * FROM phone_sales")
-            data = self.cursor.fetchall()
+    def importData(self):
+        """在后台线程中从 CSV / Excel 文件批量导入数据"""
+        file_path, _ = QFileDialog.getOpenFileName(self, "导入数据", "", IMPORT_FILTERS)
+        if not file_path:
+            return
 
-            # 将数据转换为 pandas DataFrame
-            columns = ["图片地址", "标题", "品牌", "价格", "销量_文本", "销量", "店铺名称", "评论数_字符", "评论数", "评分"]
-            df = pd.DataFrame(data, columns=columns)
+        self.importButton.setEnabled(False)
+        self.importProgress = QProgressDialog("正在导入数据...", None, 0, 0, self)
+        self.importProgress.setWindowTitle("导入")
+        self.importProgress.setWindowModality(Qt.WindowModal)
+        self.importProgress.setMinimumDuration(0)
 
-            # 弹出文件保存对话框
-            file_path, _ = QFileDialog.getSaveFileName(self, "保存 Excel 文件", "", "Excel 文件 (*.xlsx)")
+        self.importWorker = ImportWorker(DB_PATH, file_path, self)
+        self.importWorker.progressChanged.connect(
+            lambda count: self.importProgress.setLabelText(f"正在导入数据... 已读取 {count} 行")
+        )
+        self.importWorker.importFinished.connect(self.onImportFinished)
+        self.importWorker.importFailed.connect(self.onImportFailed)
+        self.importWorker.start()
 
-            if file_path:
-                # 导出为 Excel 文件
-                df.to_excel(file_path, index=False)
-                QMessageBox.information(self, "成功", f"数据已导出到 {file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"导出失败: {e}")
+    def onImportFinished(self, result):
+        self.finishImport()
+        self.loadData()
+        QMessageBox.information(self, "成功", f"导入 {result.imported} 条，重复 {result.duplicates} 条，"
+                                            f"无效 {result.invalid} 条")
+
+    def onImportFailed(self, message):
+        self.finishImport()
+        QMessageBox.critical(self, "错误", f"导入失败: {message}")
+
+    def finishImport(self):
+        self.importWorker.wait()
+        self.importWorker = None
+        self.importProgress.close()
+        self.importButton.setEnabled(True)
+
+    def exportData(self):
+        """在后台线程中把全部数据导出为 Excel / CSV 文件（已安装 pyarrow 时也可导出 Parquet）"""
+        file_path, selected = QFileDialog.getSaveFileName(self, "导出数据", "", EXPORT_FILTERS)
+        if not file_path:
+            return
+        # 未填写扩展名时按所选文件类型补全
+        if os.path.splitext(file_path)[1].lower() not in WRITERS:
+            file_path += selected[selected.index("*") + 1:-1]
+
+        self.exportButton.setEnabled(False)
+        self.exportProgress = QProgressDialog("正在导出数据...", "取消", 0, 0, self)
+        self.exportProgress.setWindowTitle("导出")
+        self.exportProgress.setWindowModality(Qt.WindowModal)
+        self.exportProgress.setMinimumDuration(0)
+        self.exportProgress.setAutoClose(False)
+        self.exportProgress.setAutoReset(False)
+
+        self.exportWorker = ExportWorker(DB_PATH, file_path, self)
+        self.exportWorker.progressChanged.connect(self.onExportProgress)
+        self.exportWorker.exportFinished.connect(self.onExportFinished)
+        self.exportWorker.exportCancelled.connect(self.onExportCancelled)
+        self.exportWorker.exportFailed.connect(self.onExportFailed)
+        self.exportProgress.canceled.connect(self.exportWorker.cancel)
+        self.exportWorker.start()
+
+    def onExportProgress(self, done, total):
+        self.exportProgress.setMaximum(total)
+        self.exportProgress.setValue(done)
+        self.exportProgress.setLabelText(f"正在导出数据... {done}/{total}")
+
+    def onExportFinished(self, file_path):
+        self.finishExport()
+        QMessageBox.information(self, "成功", f"数据已导出到 {file_path}")
+
+    def onExportCancelled(self):
+        self.finishExport()
+
+    def onExportFailed(self, message):
+        self.finishExport()
+        QMessageBox.critical(self, "错误", f"导出失败: {message}")
+
+    def finishExport(self):
+        self.exportWorker.wait()
+        self.exportWorker = None
+        self.exportProgress.close()
+        self.exportButton.setEnabled(True)
 
     def closeEvent(self, event):
-        """关闭窗口时断开数据库连接"""
+        """关闭窗口时停止搜索、导出线程，等待导入完成"""
+        self.searchWorker.stop()
+        if self.importWorker is not None:
+            self.importWorker.wait()
+        if self.exportWorker is not None:
+            self.exportWorker.cancel()
+            self.exportWorker.wait()
         self.cursor.close()
-        self.connection.close()
         event.accept()
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(close_connection)
     window = PhoneSalesManager(is_admin=True)  # 默认以管理员身份打开
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
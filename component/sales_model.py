@@ -0,0 +1,222 @@
+from array import array
+from collections import OrderedDict
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from component.schema import COLUMNS
+
+# 表头，与 COLUMNS 一一对应
+HEADERS = ["图片地址", "标题", "品牌", "价格", "销量_文本", "销量", "店铺名称", "评论数_字符", "评论数", "评分"]
+PRICE_COLUMN = COLUMNS.index("price")
+IMG_COLUMN = COLUMNS.index("img")
+
+
+def format_value(column, value):
+    """把数据库中的值格式化为界面显示的文本"""
+    if value is None:
+        return ""
+    if column == PRICE_COLUMN and isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+class PhoneSalesModel(QAbstractTableModel):
+    """phone_sales 表的分页懒加载模型
+
+    视图滚动到底部时通过 canFetchMore/fetchMore 按主键 id 分块追加行，
+    单元格数据按页读取，内存中只保留最近访问的 MAX_PAGES 页。
+    开启缩略图后第 0 列显示缩略图（由 thumbnailProvider 提供），其余列依次后移。
+    增删改后用 appendRowId / removeRowIds / refreshRowId 按 id 只更新受影响的行，无需重新加载。
+    """
+    CHUNK_SIZE = 200  # 每次 fetchMore 追加的行数
+    PAGE_SIZE = 100  # 行数据缓存的页大小
+    MAX_PAGES = 30  # 内存中最多保留的页数
+
+    def __init__(self, connection, parent=None):
+        super().__init__(parent)
+        self.connection = connection
+        self._rowids = array('q')  # 已加载行的 id，决定行顺序
+        self._pages = OrderedDict()  # 页号 -> 行数据列表（LRU）
+        self._exhausted = True
+        self.searchResults = False  # 是否正在显示 setRowIds 给出的搜索结果
+        self.thumbnailProvider = None  # url -> QPixmap 或 None，为 None 时不显示缩略图列
+
+    def setThumbnailProvider(self, provider):
+        """设置缩略图来源，传入 None 隐藏缩略图列"""
+        self.beginResetModel()
+        self.thumbnailProvider = provider
+        self.endResetModel()
+
+    def thumbnailReady(self, url):
+        """缩略图就绪，刷新内存窗口中使用该图片的单元格"""
+        if self.thumbnailProvider is None:
+            return
+        for page_no, page in self._pages.items():
+            for offset, values in enumerate(page):
+                if values is not None and values[IMG_COLUMN] == url:
+                    index = self.index(page_no * self.PAGE_SIZE + offset, 0)
+                    self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def setQuery(self):
+        """重新加载全部数据（按 id 分页）"""
+        self.beginResetModel()
+        self._rowids = array('q')
+        self._pages.clear()
+        self._exhausted = False
+        self.searchResults = False
+        self.endResetModel()
+
+    def setRowIds(self, ids):
+        """直接显示给定的 id 列表（如按相关度排序的搜索结果）"""
+        self.beginResetModel()
+        self._rowids = array('q', ids)
+        self._pages.clear()
+        self._exhausted = True
+        self.searchResults = True
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rowids)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(COLUMNS) + self._offset()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            column = section - self._offset()
+            return HEADERS[column] if column >= 0 else "缩略图"
+        return section + 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column() - self._offset()
+        if column < 0:
+            if role != Qt.DecorationRole:
+                return None
+            url = self.imageUrl(index.row())
+            return self.thumbnailProvider(url) if url else None
+        if role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        row = self._row(index.row())
+        if row is None:
+            return None
+        return format_value(column, row[column])
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        """按 id 键集分页取下一块，耗时与表大小无关"""
+        if parent.isValid() or self._exhausted:
+            return
+        last = self._rowids[-1] if self._rowids else -1
+        cursor = self.connection.execute(
+            "SELECT id FROM phone_sales WHERE id > ? ORDER BY id LIMIT ?", (last, self.CHUNK_SIZE)
+        )
+        ids = [item[0] for item in cursor.fetchall()]
+        if len(ids) < self.CHUNK_SIZE:
+            self._exhausted = True
+        if not ids:
+            return
+        start = len(self._rowids)
+        self.beginInsertRows(QModelIndex(), start, start + len(ids) - 1)
+        self._rowids.extend(ids)
+        self.endInsertRows()
+
+    def appendRowId(self, rowid):
+        """在末尾追加一行（新插入的数据），返回是否已显示
+
+        按 id 分页且尚未加载完时不追加：新 id 最大，滚动到底部时会按顺序加载到。
+        显示搜索结果时也不追加，搜索结果需重新搜索。
+        """
+        if not self._exhausted or self.searchResults:
+            return False
+        row = len(self._rowids)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rowids.append(rowid)
+        # 末页缓存不含新行，丢弃后按需重新读取
+        self._pages.pop(row // self.PAGE_SIZE, None)
+        self.endInsertRows()
+        return True
+
+    def removeRowIds(self, rowids):
+        """移除给定 id 的行（已删除的数据），不在模型中的 id 忽略"""
+        for rowid in rowids:
+            try:
+                row = self._rowids.index(rowid)
+            except ValueError:
+                continue
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._rowids[row]
+            # 该行之后的行前移，丢弃受影响的页缓存
+            first_page = row // self.PAGE_SIZE
+            for page_no in [page_no for page_no in self._pages if page_no >= first_page]:
+                del self._pages[page_no]
+            self.endRemoveRows()
+
+    def refreshRowId(self, rowid):
+        """重新读取给定 id 的一行（已修改的数据）并刷新显示"""
+        try:
+            row = self._rowids.index(rowid)
+        except ValueError:
+            return
+        page_no, offset = divmod(row, self.PAGE_SIZE)
+        page = self._pages.get(page_no)
+        if page is not None and offset < len(page):
+            page[offset] = self.connection.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM phone_sales WHERE id = ?", (rowid,)
+            ).fetchone()
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def rowId(self, row):
+        """返回指定行的 id"""
+        return self._rowids[row]
+
+    def imageUrl(self, row):
+        """返回指定行的图片地址，没有图片时返回空字符串"""
+        values = self._row(row)
+        if values is None or not values[IMG_COLUMN] or values[IMG_COLUMN] == "无":
+            return ""
+        return values[IMG_COLUMN]
+
+    def rowData(self, row):
+        """返回指定行所有字段的文本"""
+        values = self._row(row)
+        if values is None:
+            return [""] * len(COLUMNS)
+        return [format_value(column, value) for column, value in enumerate(values)]
+
+    def _offset(self):
+        return 0 if self.thumbnailProvider is None else 1
+
+    def _row(self, row):
+        page_no, offset = divmod(row, self.PAGE_SIZE)
+        page = self._pages.get(page_no)
+        if page is None:
+            page = self._loadPage(page_no)
+        else:
+            self._pages.move_to_end(page_no)
+        return page[offset] if offset < len(page) else None
+
+    def _loadPage(self, page_no):
+        """按 id 读取一页数据，并淘汰最久未访问的页"""
+        ids = self._rowids[page_no * self.PAGE_SIZE:(page_no + 1) * self.PAGE_SIZE]
+        placeholders = ",".join("?" * len(ids))
+        cursor = self.connection.execute(
+            f"SELECT id, {', '.join(COLUMNS)} FROM phone_sales WHERE id IN ({placeholders})", tuple(ids)
+        )
+        rows = {item[0]: item[1:] for item in cursor.fetchall()}
+        page = [rows.get(rowid) for rowid in ids]
+        self._pages[page_no] = page
+        while len(self._pages) > self.MAX_PAGES:
+            self._pages.popitem(last=False)
+        return page
@@ -0,0 +1,427 @@
+"""phone_sales 数据库结构及版本迁移
+
+数据库版本记录在 PRAGMA user_version 中，MIGRATIONS 中第 n 项负责把版本 n 升级到 n + 1。
+"""
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+
+# phone_sales 的业务字段（不含主键 id），顺序与界面表头一致
+COLUMNS = ["img", "title", "brand", "price", "sales_text", "sales", "shopname", "comments_count_text",
+           "comments_count", "star"]
+
+# 价格区间：上界（含）及标签，区间左开右闭，价格缺失或不大于 0 的不计入
+PRICE_BUCKET_BOUNDS = [1000, 2000, 3000, 4000, 5000]
+PRICE_BUCKET_LABELS = ['0-1000', '1000-2000', '2000-3000', '3000-4000', '4000-5000', '5000+']
+
+
+def _migrate_typed_table(cursor):
+    """v0 -> v1：全 TEXT 表改写为带整数主键的类型化表，并建立索引"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'phone_sales'")
+    exists = cursor.fetchone() is not None
+    if exists:
+        cursor.execute("ALTER TABLE phone_sales RENAME TO phone_sales_v0")
+
+    cursor.execute("""
+        CREATE TABLE phone_sales (
+            id INTEGER PRIMARY KEY,
+            img TEXT,
+            title TEXT NOT NULL,
+            brand TEXT,
+            price REAL,
+            sales_text TEXT,
+            sales INTEGER,
+            shopname TEXT,
+            comments_count_text TEXT,
+            comments_count INTEGER,
+            star REAL
+        )
+    """)
+    if exists:
+        # 保留原 rowid 作为主键，空字符串转为 NULL
+        cursor.execute("""
+            INSERT INTO phone_sales (id, img, title, brand, price, sales_text, sales, shopname,
+                                     comments_count_text, comments_count, star)
+            SELECT rowid, img, title, brand,
+                   CAST(NULLIF(TRIM(price), '') AS REAL),
+                   sales_text,
+                   CAST(NULLIF(TRIM(sales), '') AS INTEGER),
+                   shopname,
+                   comments_count_text,
+                   CAST(NULLIF(TRIM(comments_count), '') AS INTEGER),
+                   CAST(NULLIF(TRIM(star), '') AS REAL)
+            FROM phone_sales_v0
+        """)
+        cursor.execute("DROP TABLE phone_sales_v0")
+
+    # (brand, sales) 同时覆盖按品牌汇总销量的 GROUP BY
+    cursor.execute("CREATE INDEX idx_phone_sales_brand ON phone_sales (brand, sales)")
+    cursor.execute("CREATE INDEX idx_phone_sales_price ON phone_sales (price)")
+    cursor.execute("CREATE INDEX idx_phone_sales_sales ON phone_sales (sales)")
+
+
+def _migrate_title_fts(cursor):
+    """v1 -> v2：为标题建立 trigram 分词的 FTS5 索引，并用触发器与 phone_sales 保持同步"""
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE phone_sales_fts USING fts5(
+                title, content='phone_sales', content_rowid='id', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite 未编译 FTS5 或版本低于 3.34（无 trigram 分词器），标题搜索退回 LIKE
+        return
+
+    cursor.execute("""
+        CREATE TRIGGER phone_sales_fts_ai AFTER INSERT ON phone_sales BEGIN
+            INSERT INTO phone_sales_fts (rowid, title) VALUES (new.id, new.title);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER phone_sales_fts_ad AFTER DELETE ON phone_sales BEGIN
+            INSERT INTO phone_sales_fts (phone_sales_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER phone_sales_fts_au AFTER UPDATE OF title ON phone_sales BEGIN
+            INSERT INTO phone_sales_fts (phone_sales_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            INSERT INTO phone_sales_fts (rowid, title) VALUES (new.id, new.title);
+        END
+    """)
+    cursor.execute("INSERT INTO phone_sales_fts (phone_sales_fts) VALUES ('rebuild')")
+
+
+def _price_bucket_sql(price):
+    """price 表达式所属价格区间序号的 SQL 表达式"""
+    cases = "".join(f" WHEN {price} <= {bound} THEN {bucket}" for bucket, bound in enumerate(PRICE_BUCKET_BOUNDS))
+    return f"CASE WHEN {price} IS NULL OR {price} <= 0 THEN NULL{cases} ELSE {len(PRICE_BUCKET_BOUNDS)} END"
+
+
+def _summary_add_sql(row):
+    """把 row（new/old）计入汇总表的触发器语句"""
+    return f"""
+        INSERT INTO brand_summary (brand, total_sales, item_count)
+        VALUES (COALESCE({row}.brand, 'other'), COALESCE({row}.sales, 0), 1)
+        ON CONFLICT (brand) DO UPDATE SET total_sales = total_sales + excluded.total_sales,
+                                          item_count = item_count + 1;
+        INSERT INTO price_bucket_summary (bucket, total_sales, item_count)
+        SELECT bucket, COALESCE({row}.sales, 0), 1 FROM (SELECT {_price_bucket_sql(f"{row}.price")} AS bucket)
+        WHERE bucket IS NOT NULL
+        ON CONFLICT (bucket) DO UPDATE SET total_sales = total_sales + excluded.total_sales,
+                                           item_count = item_count + 1;
+    """
+
+
+def _summary_remove_sql(row):
+    """把 row（new/old）从汇总表中扣除的触发器语句"""
+    return f"""
+        UPDATE brand_summary SET total_sales = total_sales - COALESCE({row}.sales, 0), item_count = item_count - 1
+        WHERE brand = COALESCE({row}.brand, 'other');
+        DELETE FROM brand_summary WHERE brand = COALESCE({row}.brand, 'other') AND item_count <= 0;
+        UPDATE price_bucket_summary SET total_sales = total_sales - COALESCE({row}.sales, 0),
+                                        item_count = item_count - 1
+        WHERE bucket = {_price_bucket_sql(f"{row}.price")};
+    """
+
+
+def _migrate_summary_tables(cursor):
+    """v2 -> v3：按品牌、按价格区间的销量汇总表，由触发器随 phone_sales 增量维护"""
+    cursor.execute("""
+        CREATE TABLE brand_summary (
+            brand TEXT PRIMARY KEY,
+            total_sales INTEGER NOT NULL,
+            item_count INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE price_bucket_summary (
+            bucket INTEGER PRIMARY KEY,
+            total_sales INTEGER NOT NULL,
+            item_count INTEGER NOT NULL
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER phone_sales_summary_ai AFTER INSERT ON phone_sales BEGIN
+            {_summary_add_sql("new")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER phone_sales_summary_ad AFTER DELETE ON phone_sales BEGIN
+            {_summary_remove_sql("old")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER phone_sales_summary_au AFTER UPDATE OF brand, price, sales ON phone_sales BEGIN
+            {_summary_remove_sql("old")}
+            {_summary_add_sql("new")}
+        END
+    """)
+
+    _fill_summary_tables(cursor)
+
+
+def _fill_summary_tables(cursor):
+    """按 phone_sales 中的现有数据计算汇总表"""
+    cursor.execute("""
+        INSERT INTO brand_summary (brand, total_sales, item_count)
+        SELECT COALESCE(brand, 'other'), COALESCE(SUM(sales), 0), COUNT(*) FROM phone_sales GROUP BY 1
+    """)
+    cursor.execute(f"""
+        INSERT INTO price_bucket_summary (bucket, total_sales, item_count)
+        SELECT bucket, COALESCE(SUM(sales), 0), COUNT(*)
+        FROM (SELECT {_price_bucket_sql("price")} AS bucket, sales FROM phone_sales)
+        WHERE bucket IS NOT NULL
+        GROUP BY bucket
+    """)
+
+
+def _migrate_item_identity(cursor):
+    """v3 -> v4：记录商品链接及商品 id，商品 id 唯一，重复抓取时原地更新"""
+    cursor.execute("ALTER TABLE phone_sales ADD COLUMN item_id TEXT")
+    cursor.execute("ALTER TABLE phone_sales ADD COLUMN url TEXT")
+    # 旧数据没有商品 id（为 NULL），不受唯一约束影响
+    cursor.execute("CREATE UNIQUE INDEX idx_phone_sales_item_id ON phone_sales (item_id)")
+
+
+def _migrate_crawl_state(cursor):
+    """v4 -> v5：爬虫运行状态及详情页待抓取队列，中断后可从上次的位置继续"""
+    cursor.execute("""
+        CREATE TABLE crawl_run (
+            id INTEGER PRIMARY KEY,
+            keyword TEXT NOT NULL,
+            max_page INTEGER NOT NULL,
+            pages_done INTEGER NOT NULL DEFAULT 0,
+            started_at REAL NOT NULL,
+            finished_at REAL
+        )
+    """)
+    # 每个详情页一行：status 为 pending / done / failed，item 为搜索结果页解析出的商品（JSON），
+    # 抓取成功后保存详情页字段，近期抓取过的详情页直接复用
+    cursor.execute("""
+        CREATE TABLE crawl_frontier (
+            url TEXT PRIMARY KEY,
+            run_id INTEGER NOT NULL,
+            item TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            comments_count_text TEXT,
+            comments_count TEXT,
+            star TEXT,
+            fetched_at REAL,
+            error TEXT
+        )
+    """)
+    cursor.execute("CREATE INDEX idx_crawl_frontier_run ON crawl_frontier (run_id, status)")
+
+
+def _migrate_sales_snapshots(cursor):
+    """v5 -> v6：每次抓取时商品的销量快照（只追加），及按品牌、按天汇总的销量"""
+    # 价格以分为单位保存为整数；按时间范围扫描快照时只读覆盖索引
+    cursor.execute("""
+        CREATE TABLE sales_snapshot (
+            item_id TEXT NOT NULL,
+            crawled_at INTEGER NOT NULL,
+            sales INTEGER,
+            price_cents INTEGER,
+            comments_count INTEGER,
+            PRIMARY KEY (item_id, crawled_at)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX idx_sales_snapshot_time ON sales_snapshot (crawled_at, item_id, sales)")
+    cursor.execute("""
+        CREATE TABLE brand_sales_daily (
+            day TEXT NOT NULL,
+            brand TEXT NOT NULL,
+            total_sales INTEGER NOT NULL,
+            item_count INTEGER NOT NULL,
+            PRIMARY KEY (day, brand)
+        ) WITHOUT ROWID
+    """)
+
+
+def refresh_brand_sales_daily(cursor, day):
+    """重新计算 day（本地日期 YYYY-MM-DD）的品牌日销量增长
+
+    每个快照与同一商品的上一个快照相减得到销量增长，按品牌汇总当天所有快照的增长；
+    商品的第一个快照没有可比较的对象，不计入。当天抓取的商品多少不影响结果。
+    """
+    cursor.execute("DELETE FROM brand_sales_daily WHERE day = ?", (day,))
+    cursor.execute("""
+        INSERT INTO brand_sales_daily (day, brand, sales_change, item_count)
+        SELECT :day, COALESCE(p.brand, 'other'), SUM(c.change), COUNT(DISTINCT c.item_id)
+        FROM (
+            SELECT s.item_id, s.sales - (
+                SELECT prev.sales FROM sales_snapshot AS prev
+                WHERE prev.item_id = s.item_id AND prev.crawled_at < s.crawled_at
+                ORDER BY prev.crawled_at DESC LIMIT 1
+            ) AS change
+            FROM sales_snapshot AS s
+            WHERE s.crawled_at >= CAST(strftime('%s', :day, 'utc') AS INTEGER)
+              AND s.crawled_at < CAST(strftime('%s', :day, '+1 day', 'utc') AS INTEGER)
+        ) AS c
+        JOIN phone_sales AS p ON p.item_id = c.item_id
+        WHERE c.change IS NOT NULL
+        GROUP BY 2
+    """, {"day": day})
+
+
+def synthetic_item_id(title, shopname, price):
+    """没有商品 id 和链接的商品，用标题、店铺、价格的摘要作为商品 id（导入文件与旧数据使用相同的规则）
+
+    图片地址随抓取时间、图片服务器变化，不参与计算。
+    """
+    key = '|'.join((title.strip(), shopname or '', f'{price:.2f}' if price is not None else ''))
+    return 'import:' + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _migrate_legacy_item_ids(cursor):
+    """v6 -> v7：旧数据（商品 id 为 NULL）及导入的数据按 synthetic_item_id 重新计算商品 id，
+    再次导入同一商品时原地更新
+
+    标题、店铺、价格都相同的重复行只给 id 最大的一行补上，其余保持 NULL。
+    """
+    rows = cursor.execute(
+        "SELECT id, title, shopname, price FROM phone_sales WHERE item_id IS NULL OR item_id LIKE 'import:%' "
+        "ORDER BY id DESC"
+    ).fetchall()
+    cursor.execute("UPDATE phone_sales SET item_id = NULL WHERE item_id LIKE 'import:%'")
+    seen = set()
+    updates = []
+    for rowid, title, shopname, price in rows:
+        item_id = synthetic_item_id(title, shopname, price)
+        if item_id not in seen:
+            seen.add(item_id)
+            updates.append((item_id, rowid))
+    cursor.executemany("UPDATE phone_sales SET item_id = ? WHERE id = ?", updates)
+
+
+def _migrate_frontier_item_id(cursor):
+    """v7 -> v8：详情页队列改为按商品 id 记录
+
+    详情页链接带有每次展示都不同的跟踪参数，按链接记录时再次抓取无法命中近期抓取过的详情页。
+    同一商品有多行时优先保留已抓取成功、抓取时间最近的一行。
+    """
+    cursor.execute("DROP INDEX idx_crawl_frontier_run")
+    cursor.execute("ALTER TABLE crawl_frontier RENAME TO crawl_frontier_v7")
+    cursor.execute("""
+        CREATE TABLE crawl_frontier (
+            item_id TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            run_id INTEGER NOT NULL,
+            item TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            comments_count_text TEXT,
+            comments_count TEXT,
+            star TEXT,
+            fetched_at REAL,
+            error TEXT
+        )
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO crawl_frontier (item_id, url, run_id, item, status, attempts, comments_count_text,
+                                              comments_count, star, fetched_at, error)
+        SELECT json_extract(item, '$.item_id'), url, run_id, item, status, attempts, comments_count_text,
+               comments_count, star, fetched_at, error
+        FROM crawl_frontier_v7
+        WHERE json_extract(item, '$.item_id') IS NOT NULL
+        ORDER BY status = 'done' DESC, fetched_at DESC
+    """)
+    cursor.execute("DROP TABLE crawl_frontier_v7")
+    cursor.execute("CREATE INDEX idx_crawl_frontier_run ON crawl_frontier (run_id, status)")
+
+
+def _migrate_sales_change_rollup(cursor):
+    """v8 -> v9：品牌日销量改为汇总各商品相邻两次快照之间的销量增长
+
+    原来汇总当天抓取到的商品的销量总数，抓取中途停止或多抓取几页都会表现为销量的大幅涨跌。
+    按现有快照重新计算每一天。
+    """
+    cursor.execute("DROP TABLE brand_sales_daily")
+    cursor.execute("""
+        CREATE TABLE brand_sales_daily (
+            day TEXT NOT NULL,
+            brand TEXT NOT NULL,
+            sales_change INTEGER NOT NULL,
+            item_count INTEGER NOT NULL,
+            PRIMARY KEY (day, brand)
+        ) WITHOUT ROWID
+    """)
+    days = cursor.execute(
+        "SELECT DISTINCT date(crawled_at, 'unixepoch', 'localtime') FROM sales_snapshot"
+    ).fetchall()
+    for day, in days:
+        refresh_brand_sales_daily(cursor, day)
+
+
+MIGRATIONS = [
+    _migrate_typed_table,
+    _migrate_title_fts,
+    _migrate_summary_tables,
+    _migrate_item_identity,
+    _migrate_crawl_state,
+    _migrate_sales_snapshots,
+    _migrate_legacy_item_ids,
+    _migrate_frontier_item_id,
+    _migrate_sales_change_rollup,
+]
+
+
+def migrate(connection):
+    """把数据库升级到最新版本，每个版本在独立事务中执行
+
+    界面和爬虫可能同时打开同一个数据库：每一步先取得写锁（BEGIN IMMEDIATE），再在事务内读取版本号，
+    其他连接已完成的步骤不会重复执行。
+    """
+    cursor = connection.cursor()
+    try:
+        while True:
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] >= len(MIGRATIONS):
+                break
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute("PRAGMA user_version")
+                version = cursor.fetchone()[0]
+                if version < len(MIGRATIONS):
+                    MIGRATIONS[version](cursor)
+                    cursor.execute(f"PRAGMA user_version = {version + 1}")
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+    finally:
+        cursor.close()
+
+
+@contextmanager
+def bulk_load(connection):
+    """在一个事务中大批量写入 phone_sales
+
+    写入期间临时删除 phone_sales 上的触发器，避免逐行维护全文索引和汇总表；
+    结束时一次性重建全文索引、重新计算汇总表并恢复触发器。出错时整个事务回滚。
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("BEGIN")
+        try:
+            triggers = cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'phone_sales'"
+            ).fetchall()
+            for name, _ in triggers:
+                cursor.execute(f"DROP TRIGGER {name}")
+            yield
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'phone_sales_fts'")
+            if cursor.fetchone() is not None:
+                cursor.execute("INSERT INTO phone_sales_fts (phone_sales_fts) VALUES ('rebuild')")
+            cursor.execute("DELETE FROM brand_summary")
+            cursor.execute("DELETE FROM price_bucket_summary")
+            _fill_summary_tables(cursor)
+            for _, sql in triggers:
+                cursor.execute(sql)
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+    finally:
+        cursor.close()
@@ -0,0 +1,141 @@
+"""手机销售数据的条件搜索
+
+标题关键词优先走 phone_sales_fts（trigram 分词）全文索引并按相关度排序，
+少于 3 个字符的关键词无法用 trigram 匹配，退回 LIKE 过滤。
+"""
+import sqlite3
+import threading
+from array import array
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from component.db import connect
+
+FTS_MIN_LENGTH = 3  # trigram 分词器可匹配的最短关键词
+
+
+def has_fts(connection):
+    """数据库中是否存在标题全文索引"""
+    cursor = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'phone_sales_fts'"
+    )
+    return cursor.fetchone() is not None
+
+
+def build_search_query(title="", brand="", min_price="", max_price="", use_fts=True):
+    """构建只返回 id 列的搜索语句，返回 (sql, params)
+
+    使用全文索引时结果按 rank（bm25）排序，否则按 id 排序。
+    价格无法转换为数字时抛出 ValueError。
+    """
+    conditions = []
+    params = []
+    match_terms = []
+
+    for keyword in title.split():
+        if use_fts and len(keyword) >= FTS_MIN_LENGTH:
+            # 每个关键词作为一个短语，关键词之间为 AND
+            match_terms.append('"' + keyword.replace('"', '""') + '"')
+        else:
+            conditions.append("p.title LIKE ?")
+            params.append(f"%{keyword}%")
+    if brand:
+        conditions.append("p.brand LIKE ?")
+        params.append(f"%{brand}%")
+    if min_price:
+        conditions.append("p.price >= ?")
+        params.append(float(min_price))
+    if max_price:
+        conditions.append("p.price <= ?")
+        params.append(float(max_price))
+
+    if match_terms:
+        query = ("SELECT p.id FROM phone_sales_fts JOIN phone_sales AS p ON p.id = phone_sales_fts.rowid"
+                 " WHERE phone_sales_fts MATCH ?")
+        params.insert(0, " AND ".join(match_terms))
+        order = " ORDER BY phone_sales_fts.rank"
+    else:
+        query = "SELECT p.id FROM phone_sales AS p WHERE 1=1"
+        order = " ORDER BY p.id"
+    for condition in conditions:
+        query += f" AND {condition}"
+    return query + order, params
+
+
+class SearchWorker(QThread):
+    """后台搜索线程
+
+    使用独立的数据库连接执行查询。新请求到达时中断正在执行的过期查询，
+    只有最新一次请求的结果会通过 resultsReady 交付。
+    """
+    resultsReady = pyqtSignal(int, object)  # 请求序号, id 数组
+    searchFailed = pyqtSignal(int, str)  # 请求序号, 错误信息
+
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self._condition = threading.Condition()
+        self._pending = None  # 尚未执行的最新请求
+        self._generation = 0  # 最新请求的序号
+        self._connection = None
+        self._running = True
+
+    def submit(self, title, brand, min_price, max_price):
+        """提交搜索请求，返回请求序号"""
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, (title, brand, min_price, max_price))
+            self._interrupt()
+            self._condition.notify()
+            return self._generation
+
+    def cancel(self):
+        """作废所有未完成的请求，返回新的序号"""
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+            self._interrupt()
+            return self._generation
+
+    def stop(self):
+        """结束线程"""
+        with self._condition:
+            self._running = False
+            self._interrupt()
+            self._condition.notify()
+        self.wait()
+
+    def _interrupt(self):
+        if self._connection is not None:
+            self._connection.interrupt()
+
+    def run(self):
+        connection = connect(self.db_path)
+        use_fts = has_fts(connection)
+        with self._condition:
+            self._connection = connection
+        try:
+            while True:
+                with self._condition:
+                    while self._pending is None and self._running:
+                        self._condition.wait()
+                    if not self._running:
+                        break
+                    generation, args = self._pending
+                    self._pending = None
+
+                try:
+                    query, params = build_search_query(*args, use_fts=use_fts)
+                    ids = array('q', (item[0] for item in connection.execute(query, params)))
+                except (sqlite3.Error, ValueError) as e:
+                    # 被中断的过期查询直接丢弃
+                    if generation == self._generation:
+                        self.searchFailed.emit(generation, str(e))
+                    continue
+
+                if generation == self._generation:
+                    self.resultsReady.emit(generation, ids)
+        finally:
+            with self._condition:
+                self._connection = None
+            connection.close()
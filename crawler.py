@@ -1,34 +1,45 @@
-import csv
-import os.path
-import sqlite3
-import time
-
 from selenium import webdriver
-from selenium.common import TimeoutException
 from selenium.webdriver import Keys
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-import re
 
+from spider.detail_pool import DetailTabPool, RateLimiter
+from spider.frontier import Frontier
+from spider.http_fetcher import HttpDetailFetcher
+from spider.parser import parse_detail, parse_items
+from spider.sink import SalesSink
+from spider.wait import (RESULTS_CSS, Backoff, is_blocked, wait_for, wait_for_new_window, wait_for_page_change,
+                         wait_for_results, wait_until_unblocked)
+
+
+def save_item(sink, item, detail):
+    """合并详情页字段后写入 sink"""
+    comments_count_text, comments_count, star = detail
+    item.update(comments_count_text=comments_count_text, comments_count=comments_count, star=star)
+    print('items', item['img'], item['title'], item['price'], item['sales'], item['shopname'],
+          comments_count_text, comments_count, star)
+    sink.add(item)
 
-def element_located(xpath):
-    print(f"定位元素：{xpath}")
-    try:
-        ele = WebDriverWait(driver, 60).until(
-            EC.presence_of_element_located((By.XPATH,
-                                            xpath))
-        )
-    except TimeoutException:
-        print(f'元素：{xpath}等待超时')
-    return ele
+
+def fetch_details(detail_pool, frontier, sink, items):
+    """并发打开详情页获取一些信息，成功的写入 sink，仍是验证码页面的记为失败等待重试"""
+    details = detail_pool.fetch([item['url'] for item in items])
+    for item, (_, detail_page_source) in zip(items, details):
+        if is_blocked(detail_page_source):
+            frontier.failed(item['item_id'], '验证码未通过')
+            continue
+        detail = parse_detail(detail_page_source)
+        frontier.done(item['item_id'], detail)
+        save_item(sink, item, detail)
 
 
 if __name__ == '__main__':
+    KEYWORD = '手机'
     MAX_PAGE = 10
+    DETAIL_WORKERS = 4  # 同时打开的详情页标签数，设为 1 即逐个抓取
+    HOST_INTERVAL = 1.0  # 同一主机两次详情页请求的最小间隔（秒）
+    HTTP_DETAIL = True  # 详情页用 HTTP 直接下载，遇到验证码时才用浏览器标签页打开
     # 指定 chromedriver.exe 的路径
     chrome_driver_path = r"chromedriver/chromedriver.exe"  # 替换为你的 chromedriver.exe 路径
     # 配置 ChromeOptions
@@ -39,92 +50,65 @@ if __name__ == '__main__':
     driver = webdriver.Chrome(service=service, options=chrome_options)
     print('driver', driver, 'connected')
     driver.get("https://www.taobao.com")
-    input_search = element_located('//*[@id="q"]')
-    input_search.send_keys('手机')
-    time.sleep(3)
+    input_search = wait_for(driver, (By.XPATH, '//*[@id="q"]'), 60)
+    input_search.send_keys(KEYWORD)
+    window_count = len(driver.window_handles)
     input_search.send_keys(Keys.RETURN)
-    time.sleep(5)
+    # 搜索结果可能在新标签页打开
+    wait_for_new_window(driver, window_count, 10)
     driver.switch_to.window(driver.window_handles[-1])
-    for i in range(MAX_PAGE):
-        print(f'处理第{i}页的数据')
-        if i == 0:
-            pass
-        else:
-            obj1 = driver.find_element(By.CLASS_NAME, 'next-pagination-pages')
-            obj2 = obj1.find_element(By.CSS_SELECTOR, '[class^="next-icon next-icon-arrow-right"]')
-            obj2.click()
-            time.sleep(5)
+    backoff = Backoff()
+    rate_limiter = RateLimiter(HOST_INTERVAL)
+    detail_pool = DetailTabPool(driver, DETAIL_WORKERS, rate_limiter, backoff)
+    if HTTP_DETAIL:
+        detail_pool = HttpDetailFetcher(driver, DETAIL_WORKERS, rate_limiter, backoff, fallback=detail_pool)
+    # 整个运行共用一个数据库连接和 CSV 文件，每页提交一次，中断时也会写完已抓取的数据
+    with SalesSink(csv_path="output.csv") as sink:
+        # 上次中断的运行从已完成的页之后继续
+        frontier = Frontier(sink.connection, KEYWORD, MAX_PAGE)
+        for i in range(MAX_PAGE):
+            print(f'处理第{i}页的数据')
+            if i == 0:
+                loaded = wait_for_results(driver)
+            else:
+                backoff.sleep()
+                first_item = driver.find_element(By.CSS_SELECTOR, RESULTS_CSS)
+                obj1 = driver.find_element(By.CLASS_NAME, 'next-pagination-pages')
+                obj2 = obj1.find_element(By.CSS_SELECTOR, '[class^="next-icon next-icon-arrow-right"]')
+                obj2.click()
+                loaded = wait_for_page_change(driver, first_item)
 
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, "html.parser")
-        parent_item = soup.select('div[class^="content--"]')
-        items = parent_item[0].select('div[class^="tbpc-col"]')
+            if is_blocked(driver.page_source):
+                backoff.failed()
+                loaded = wait_until_unblocked(driver) and wait_for_results(driver)
+            elif loaded:
+                backoff.succeeded()
+            if not loaded:
+                print(f'第{i}页加载失败，停止抓取')
+                break
 
-        # 文件写入
-        f = open('output.csv', 'a+', newline='', encoding='utf-8')
-        wt = csv.writer(f)
-        if not os.path.exists('output.csv'):
-            wt.writerow(['img', 'title', 'brand', 'price', 'sales', 'shopname', 'comments_count_text', 'comments_count',
-                         'star'])
-        for item in items:  # doubleCardWrapperAda
-            prefix = 'https:'
-            url_a_obj = item.select('a[class^="doubleCardWrapperAda"]')[0]
-            url = prefix + url_a_obj.get('href')
-            img = item.select("img[class^='mainPic--']")[0].get('src') if len(
-                item.select("img[class^='mainPic--']")) > 0 else '无'
-            title = item.select('div[class^="title--"]')[0].text
-            brand = 'other'
-            if title.__contains__('华为') or title.lower().__contains__('huawei') or title.__contains__('荣耀'):
-                brand = '华为'
-            elif (title.__contains__('小米') or title.lower().__contains__('redmi') or
-                  title.lower().__contains__('red mi')) or title.__contains__('红米'):
-                brand = '小米'
-            elif title.lower().__contains__('oppo') or title.lower().__contains__('realme') or title.__contains__('真我'):
-                brand = 'oppo'
-            elif title.lower().__contains__('vivo'):
-                brand = 'vivo'
-            elif title.lower().__contains__('oneplus') or title.__contains__('一加'):
-                brand = '一加'
-            elif title.lower().__contains__('moto') or title.__contains__('摩托罗拉'):
-                brand = 'moto'
-            price = item.select('div[class^="innerPrice"]')[0].text
-            sales_text = item.select('span[class^="realSales--"]')[0].text if len(
-                item.select('span[class^="realSales--"]')) > 0 else 100
-            sales_text = str(sales_text)
-            if sales_text.__contains__('万'):
-                sales_text = sales_text.replace('万', '0000')
-            sales = ''.join(re.findall(r'\d+', sales_text))
-            shopname = item.select('span[class^="shopNameText--"]')[0].text
+            if i < frontier.pages_done:
+                print(f'第{i}页已完成，跳过')
+                continue
 
-            # 跳转详情获取一些信息
-            driver.execute_script(f"window.open('{url}', '_blank');")
-            driver.switch_to.window(driver.window_handles[-1])  # 切换 到详情界面
-            detail = driver.get(url)
-            # time.sleep(20)
-            detail_page_source = driver.page_source
-            if detail_page_source.__contains__('captcha'):
-                print('检测到需要你手动操作过滑块，你有30秒时间')
-                time.sleep(30)
-            detail_soup = BeautifulSoup(detail_page_source, "html.parser")
-            comments_count_text = detail_soup.select('span[class^="tagItem--"]')[0].text if len(
-                detail_soup.select('span[class^="tagItem--"]')) else '0'
-            star = detail_soup.select('span[class^="starNum--"]')[0].text if len(
-                detail_soup.select('span[class^="starNum--"]')) > 0 else '3'
-            if comments_count_text.__contains__('万'):
-                comments_count_text = comments_count_text.replace('万', '0000')
-            comments_count = ''.join(re.findall(r'\d+', comments_count_text))
-            time.sleep(2)
-            driver.close()
-            driver.switch_to.window(driver.window_handles[1])  # 详情切回来
-            print('items', img, title, price, sales, shopname, comments_count_text, comments_count, star)
-            wt.writerow([img, title, brand, price, sales, shopname, comments_count_text, comments_count, star])
-            # insert into table
-            connection = sqlite3.connect("phone_sales.db")  # 数据库文件
-            cursor = connection.cursor()
-            cursor.execute(
-                "INSERT INTO phone_sales (img, title, brand, price,sales_text, sales, shopname, comments_count_text, comments_count, star) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?,?)",
-                (img, title, brand, price, sales_text, sales, shopname, comments_count_text, comments_count, star)
-            )
-            connection.commit()
-        f.close()
-    # print(page_source)
+            items = parse_items(driver.page_source)
+            to_fetch, cached = frontier.add(items)
+            for item, detail in cached:
+                save_item(sink, item, detail)
+            fetch_details(detail_pool, frontier, sink, to_fetch)
+            # 本页的商品和抓取进度在同一个事务中提交
+            frontier.page_done(i)
+            sink.flush()
+            frontier.commit()
+            print(f'详情页吞吐量：{detail_pool.throughput():.1f} 条/分钟')
+        else:
+            # 全部页处理完后重试失败的详情页，每个详情页最多尝试 MAX_ATTEMPTS 次
+            for _ in range(Frontier.MAX_ATTEMPTS - 1):
+                items = frontier.pending()
+                if not items:
+                    break
+                print(f'重试{len(items)}个详情页')
+                fetch_details(detail_pool, frontier, sink, items)
+                sink.flush()
+                frontier.commit()
+            frontier.finish()
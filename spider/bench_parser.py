@@ -0,0 +1,60 @@
+"""解析性能基准：对比 lxml 解析与原 BeautifulSoup 解析
+
+用法（在项目根目录下）：python -m spider.bench_parser [test.html] [重复次数]
+"""
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from spider.brand import classify_brand
+from spider.parser import item_id_from_url, parse_items
+
+
+def legacy_parse_items(page_source):
+    """原 crawler.py 中基于 BeautifulSoup(html.parser) 的解析逻辑，仅用于对比"""
+    soup = BeautifulSoup(page_source, "html.parser")
+    parent_item = soup.select('div[class^="content--"]')
+    items = parent_item[0].select('div[class^="tbpc-col"]')
+    results = []
+    for item in items:
+        url = 'https:' + item.select('a[class^="doubleCardWrapperAda"]')[0].get('href')
+        img = item.select("img[class^='mainPic--']")[0].get('src') if len(
+            item.select("img[class^='mainPic--']")) > 0 else '无'
+        title = item.select('div[class^="title--"]')[0].text.strip()
+        price = re.sub(r'\s+', '', item.select('div[class^="innerPrice"]')[0].text)
+        sales_text = item.select('span[class^="realSales--"]')[0].text if len(
+            item.select('span[class^="realSales--"]')) > 0 else 100
+        sales_text = str(sales_text)
+        if sales_text.__contains__('万'):
+            sales_text = sales_text.replace('万', '0000')
+        sales = ''.join(re.findall(r'\d+', sales_text))
+        shopname = item.select('span[class^="shopNameText--"]')[0].text
+        results.append({'item_id': item_id_from_url(url), 'url': url, 'img': img, 'title': title,
+                        'brand': classify_brand(title), 'price': price, 'sales_text': sales_text, 'sales': sales,
+                        'shopname': shopname})
+    return results
+
+
+def bench(parse, page_source, repeat):
+    """重复解析 repeat 次，返回 (商品数, 每秒解析商品数)"""
+    count = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        count += len(parse(page_source))
+    elapsed = time.perf_counter() - start
+    return count // repeat, count / elapsed
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else 'test.html'
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with open(path, encoding='utf-8') as f:
+        page_source = f.read()
+
+    if parse_items(page_source) != legacy_parse_items(page_source):
+        print('警告：两种解析方式的结果不一致')
+    for name, parse in (('BeautifulSoup(html.parser)', legacy_parse_items), ('lxml', parse_items)):
+        count, rate = bench(parse, page_source, repeat)
+        print(f'{name:<28} 每页 {count} 个商品，{rate:8.1f} 个/秒')
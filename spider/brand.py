@@ -0,0 +1,97 @@
+"""品牌识别：品牌别名表编译成一个正则，每个标题只扫描一遍
+
+标题中出现多个品牌时取 BRAND_ALIASES 中靠前的品牌，子品牌（如荣耀、一加）排在母品牌之前。
+命令行批量重新识别已有数据的品牌（在项目根目录下）：
+    python -m spider.brand [--db phone_sales.db] [--batch 1000] [--aliases brands.json]
+"""
+import argparse
+import json
+import re
+
+from component.db import DB_PATH, connect
+
+DEFAULT_BRAND = 'other'
+
+# 品牌 -> 别名（不区分大小写），顺序即优先级
+BRAND_ALIASES = {
+    '荣耀': ['荣耀', 'honor'],
+    '华为': ['华为', 'huawei'],
+    '一加': ['一加', 'oneplus'],
+    'realme': ['realme', '真我'],
+    '小米': ['小米', 'xiaomi', 'redmi', 'red mi', '红米'],
+    'oppo': ['oppo'],
+    'vivo': ['vivo', 'iqoo'],
+    '苹果': ['苹果', 'apple', 'iphone'],
+    '三星': ['三星', 'samsung', 'galaxy'],
+    'moto': ['moto', '摩托罗拉'],
+    '魅族': ['魅族', 'meizu'],
+    '努比亚': ['努比亚', 'nubia', '红魔'],
+    '中兴': ['中兴', 'zte'],
+}
+
+
+class BrandClassifier:
+    """按别名表识别标题中的品牌"""
+    def __init__(self, aliases=None):
+        aliases = BRAND_ALIASES if aliases is None else aliases
+        self.brands = {}  # 小写别名 -> (优先级, 品牌)
+        for priority, (brand, names) in enumerate(aliases.items()):
+            for name in names:
+                self.brands.setdefault(name.lower(), (priority, brand))
+        # 长别名优先，避免被其前缀截断
+        names = sorted(self.brands, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(re.escape(name) for name in names), re.IGNORECASE)
+
+    def classify(self, title):
+        """返回标题对应的品牌，未识别时返回 DEFAULT_BRAND"""
+        found = [self.brands[match.group(0).lower()] for match in self.pattern.finditer(title)]
+        return min(found)[1] if found else DEFAULT_BRAND
+
+
+_default_classifier = BrandClassifier()
+
+
+def classify_brand(title):
+    """使用默认别名表识别品牌"""
+    return _default_classifier.classify(title)
+
+
+def reclassify(connection, classifier, batch_size=1000):
+    """按 id 分批重新识别 phone_sales 中的品牌，每批一个事务，返回更新的行数"""
+    updated = 0
+    last_id = -1
+    while True:
+        rows = connection.execute(
+            "SELECT id, title, brand FROM phone_sales WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+        ).fetchall()
+        if not rows:
+            return updated
+        last_id = rows[-1][0]
+        changes = []
+        for row_id, title, old_brand in rows:
+            brand = classifier.classify(title)
+            if brand != old_brand:
+                changes.append((brand, row_id))
+        if changes:
+            with connection:
+                connection.executemany("UPDATE phone_sales SET brand = ? WHERE id = ?", changes)
+            updated += len(changes)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='批量重新识别 phone_sales 中的品牌')
+    parser.add_argument('--db', default=DB_PATH, help='数据库文件')
+    parser.add_argument('--batch', type=int, default=1000, help='每个事务处理的行数')
+    parser.add_argument('--aliases', help='品牌别名表 JSON 文件，格式同 BRAND_ALIASES')
+    args = parser.parse_args()
+
+    aliases = None
+    if args.aliases:
+        with open(args.aliases, encoding='utf-8') as f:
+            aliases = json.load(f)
+    connection = connect(args.db)
+    try:
+        count = reclassify(connection, BrandClassifier(aliases), args.batch)
+        print(f'已更新 {count} 条数据的品牌')
+    finally:
+        connection.close()
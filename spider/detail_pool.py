@@ -0,0 +1,103 @@
+"""详情页并发抓取：在同一个浏览器里同时打开多个标签页加载详情页"""
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+from selenium.common import TimeoutException
+from selenium.webdriver.support.wait import WebDriverWait
+
+from spider.wait import Backoff, is_blocked, wait_until_unblocked
+
+
+class RateLimiter:
+    """按主机限速：同一主机两次请求之间至少间隔 min_interval 秒（线程安全）"""
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_at = {}  # 主机 -> 下一次允许请求的时间
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            ready_at = max(now, self._next_at.get(host, 0))
+            self._next_at[host] = ready_at + self.min_interval
+        if ready_at > now:
+            time.sleep(ready_at - now)
+
+
+class DetailTabPool:
+    """详情页标签池
+
+    最多同时打开 size 个标签页，标签页在浏览器后台并行加载，
+    按提交顺序逐个读取页面源码后关闭，再补开队列中的下一个详情页。
+    """
+    def __init__(self, driver, size=4, rate_limiter=None, backoff=None, page_timeout=30):
+        self.driver = driver
+        self.size = max(1, size)
+        self.rate_limiter = rate_limiter or RateLimiter(0)
+        self.backoff = backoff or Backoff()
+        self.page_timeout = page_timeout
+        self.completed = 0
+        self.busy = 0.0  # 在 fetch() 中等待详情页的累计秒数，不含调用方处理页面及搜索结果页翻页的时间
+
+    def fetch(self, urls):
+        """依次产出 (url, 页面源码)，调用方处理当前页面时其余标签页继续加载"""
+        home = self.driver.current_window_handle
+        queue = deque(urls)
+        inflight = deque()  # (url, 标签页句柄)
+        resumed = time.monotonic()
+        try:
+            while queue or inflight:
+                while queue and len(inflight) < self.size:
+                    url = queue.popleft()
+                    inflight.append((url, self._open(url)))
+
+                url, handle = inflight.popleft()
+                self.driver.switch_to.window(handle)
+                self._wait_loaded()
+                page_source = self.driver.page_source
+                if is_blocked(page_source):
+                    self.backoff.failed()
+                    wait_until_unblocked(self.driver)
+                    self._wait_loaded()
+                    page_source = self.driver.page_source
+                else:
+                    self.backoff.succeeded()
+                self.driver.close()
+                self.driver.switch_to.window(home)
+                self.completed += 1
+                self.busy += time.monotonic() - resumed
+                resumed = None
+                yield url, page_source
+                resumed = time.monotonic()
+        finally:
+            if resumed is not None:
+                self.busy += time.monotonic() - resumed
+            # 中途退出时关闭还在加载的标签页
+            for _, handle in inflight:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            self.driver.switch_to.window(home)
+
+    def throughput(self):
+        """已完成详情页的吞吐量（条/分钟），只按 fetch() 中的耗时计算"""
+        return self.completed * 60 / self.busy if self.busy > 0 else 0.0
+
+    def _open(self, url):
+        """在后台新标签页打开 url，返回新标签页句柄"""
+        self.rate_limiter.wait(url)
+        self.backoff.sleep()
+        before = set(self.driver.window_handles)
+        self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+        return (set(self.driver.window_handles) - before).pop()
+
+    def _wait_loaded(self):
+        """等待当前标签页加载完成，超时后按已加载的内容继续"""
+        try:
+            WebDriverWait(self.driver, self.page_timeout).until(
+                lambda driver: driver.execute_script("return document.readyState") == 'complete'
+            )
+        except TimeoutException:
+            print(f'详情页加载超时：{self.driver.current_url}')
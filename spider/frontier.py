@@ -0,0 +1,93 @@
+"""可续爬的抓取状态：运行进度和详情页队列保存在数据库中
+
+每次运行记录在 crawl_run 中（已完成的页数），每个商品的详情页按商品 id 记录在 crawl_frontier 中。
+程序中断后再次运行同一关键词时，跳过已完成的页，并重试上次未完成的详情页。
+"""
+import json
+import time
+
+
+class Frontier:
+    """详情页队列
+
+    与 SalesSink 共用连接，队列的修改随 sink.flush() 一起提交，也可调用 commit() 单独提交。
+    """
+    RECENT_SECONDS = 24 * 3600  # 此时间内抓取过的详情页不再重复抓取
+    MAX_ATTEMPTS = 3  # 每次运行中一个详情页最多尝试的次数
+
+    def __init__(self, connection, keyword, max_page):
+        self.connection = connection
+        row = connection.execute(
+            "SELECT id, pages_done FROM crawl_run WHERE keyword = ? AND finished_at IS NULL ORDER BY id DESC LIMIT 1",
+            (keyword,)
+        ).fetchone()
+        if row is None:
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO crawl_run (keyword, max_page, started_at) VALUES (?, ?, ?)",
+                    (keyword, max_page, time.time())
+                )
+            self.run_id, self.pages_done = cursor.lastrowid, 0
+        else:
+            self.run_id, self.pages_done = row
+            print(f'继续上次的抓取：已完成{self.pages_done}页')
+
+    def add(self, items):
+        """登记一页的商品，返回 (需要抓取详情页的商品, [(近期已抓取的商品, 详情页字段)])"""
+        to_fetch, cached = [], []
+        recent = time.time() - self.RECENT_SECONDS
+        for item in items:
+            row = self.connection.execute(
+                "SELECT run_id, status, fetched_at, comments_count_text, comments_count, star "
+                "FROM crawl_frontier WHERE item_id = ?", (item['item_id'],)
+            ).fetchone()
+            if row is not None and row[1] == 'done' and row[2] >= recent:
+                cached.append((item, row[3:]))
+                continue
+            if row is not None and row[0] == self.run_id and row[1] == 'failed':
+                continue  # 本次运行已达到重试上限
+            # 新的运行重新计算尝试次数；链接中的跟踪参数每次不同，记录最新的链接
+            self.connection.execute(
+                "INSERT INTO crawl_frontier (item_id, url, run_id, item) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (item_id) DO UPDATE SET url = excluded.url, item = excluded.item, status = 'pending', "
+                "attempts = CASE WHEN run_id = excluded.run_id THEN attempts ELSE 0 END, run_id = excluded.run_id",
+                (item['item_id'], item['url'], self.run_id, json.dumps(item, ensure_ascii=False))
+            )
+            to_fetch.append(item)
+        return to_fetch, cached
+
+    def pending(self):
+        """本次运行中尚未成功、仍可重试的商品"""
+        cursor = self.connection.execute(
+            "SELECT item FROM crawl_frontier WHERE run_id = ? AND status = 'pending' ORDER BY rowid", (self.run_id,)
+        )
+        return [json.loads(row[0]) for row in cursor]
+
+    def done(self, item_id, detail):
+        """商品的详情页抓取成功，detail 为 parse_detail 的结果"""
+        self.connection.execute(
+            "UPDATE crawl_frontier SET status = 'done', attempts = attempts + 1, comments_count_text = ?, "
+            "comments_count = ?, star = ?, fetched_at = ?, error = NULL WHERE item_id = ?",
+            (*detail, time.time(), item_id)
+        )
+
+    def failed(self, item_id, error):
+        """商品的详情页抓取失败，达到尝试上限后不再重试"""
+        self.connection.execute(
+            "UPDATE crawl_frontier SET attempts = attempts + 1, error = ?, "
+            "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END WHERE item_id = ?",
+            (error, self.MAX_ATTEMPTS, item_id)
+        )
+
+    def page_done(self, page):
+        """第 page 页（从 0 开始）已处理完"""
+        self.pages_done = page + 1
+        self.connection.execute("UPDATE crawl_run SET pages_done = ? WHERE id = ?", (self.pages_done, self.run_id))
+
+    def finish(self):
+        """本次运行结束，下次运行从第 0 页开始"""
+        with self.connection:
+            self.connection.execute("UPDATE crawl_run SET finished_at = ? WHERE id = ?", (time.time(), self.run_id))
+
+    def commit(self):
+        self.connection.commit()
@@ -0,0 +1,219 @@
+"""不经过浏览器的详情页抓取：复用浏览器的 Cookie 和 User-Agent，用 HTTP 连接池直接下载详情页
+
+接口与 DetailTabPool 相同（fetch 按顺序产出 (url, 页面源码)），返回验证码页面或页面需要脚本渲染
+（找不到评论数、评分元素）时交给浏览器标签池重新打开。
+本地测试（启动一个本地 HTTP 服务并抓取，默认返回内置的示例详情页并检查解析结果，也可指定保存的页面）：
+    python -m spider.http_fetcher [detail.html ...] [--count 40]
+"""
+import argparse
+import http.server
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.common import WebDriverException
+
+from spider.detail_pool import RateLimiter
+from spider.parser import parse_detail
+from spider.wait import Backoff, is_blocked
+
+DETAIL_MARKERS = ('tagItem--', 'starNum--')  # 详情页中评论数、评分元素的 class 前缀
+
+# 本地测试用的示例详情页（只保留评论数、评分元素）及其解析结果
+SAMPLE_DETAIL = ('<html><head><meta charset="utf-8"></head><body><div class="rate--k3Xb2">'
+                 '<span class="tagItem--u8Q2c">全部(2万+)</span><span class="starNum--pa1Gv">4.8</span>'
+                 '</div></body></html>')
+SAMPLE_DETAIL_FIELDS = ('全部(20000+)', '20000', '4.8')
+
+
+class HttpDetailFetcher:
+    """详情页 HTTP 抓取器
+
+    最多 size 个请求并发，连接保持复用（keep-alive）。fallback 为 DetailTabPool 时，
+    验证码或缺少详情元素的页面改用浏览器打开：第一次遇到这样的页面时等待其余请求完成，
+    把需要浏览器的页面一次交给标签池并发打开，浏览器中通过验证后重新复制 Cookie。
+    """
+    def __init__(self, driver=None, size=8, rate_limiter=None, backoff=None, fallback=None, timeout=10):
+        self.driver = driver
+        self.rate_limiter = rate_limiter or RateLimiter(0)
+        self.backoff = backoff or Backoff()
+        self.fallback = fallback
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=size)
+        self.completed = 0
+        self.fallbacks = 0  # 交给浏览器打开的页面数
+        self.busy = 0.0  # 在 fetch() 中等待详情页的累计秒数，不含调用方处理页面及搜索结果页翻页的时间
+        if driver is not None:
+            self.load_browser_state()
+
+    def load_browser_state(self):
+        """复制浏览器的全部 Cookie 和 User-Agent
+
+        get_cookies() 只返回当前页面（搜索结果页）所在域名的 Cookie，详情页多在 detail.tmall.com，
+        因此通过 DevTools 协议读取浏览器中所有域名的 Cookie，各自按原域名设置。
+        """
+        self.session.headers['User-Agent'] = self.driver.execute_script('return navigator.userAgent')
+        try:
+            cookies = self.driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']
+        except (AttributeError, WebDriverException):
+            cookies = self.driver.get_cookies()  # 不支持 DevTools 协议的浏览器
+        for cookie in cookies:
+            self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'),
+                                     path=cookie.get('path', '/'), secure=cookie.get('secure', False))
+
+    def fetch(self, urls):
+        """依次产出 (url, 页面源码)，调用方处理当前页面时其余请求继续下载"""
+        resumed = time.monotonic()
+        futures = [self.executor.submit(self._get, url) for url in urls]
+        pages = {}  # 序号 -> HTTP 下载的结果
+        in_browser = None  # 浏览器打开的页面源码（生成器）
+
+        def page(index):
+            if index not in pages:
+                pages[index] = self._result(urls[index], futures[index])
+            return pages[index]
+
+        try:
+            for index, url in enumerate(urls):
+                page_source = page(index)
+                if self._usable(page_source):
+                    self.backoff.succeeded()
+                else:
+                    if in_browser is None:
+                        retry = [i for i in range(index, len(urls)) if not self._usable(page(i))]
+                        in_browser = self._fetch_in_browser([(urls[i], pages[i]) for i in retry])
+                    page_source = next(in_browser)
+                self.completed += 1
+                self.busy += time.monotonic() - resumed
+                resumed = None
+                yield url, page_source
+                resumed = time.monotonic()
+            if in_browser is not None and self.fallback is not None and self.driver is not None:
+                self.load_browser_state()
+        finally:
+            if resumed is not None:
+                self.busy += time.monotonic() - resumed
+            # 中途退出时取消尚未开始的请求，关闭还在加载的标签页
+            for future in futures:
+                future.cancel()
+            if in_browser is not None:
+                in_browser.close()
+
+    def throughput(self):
+        """已完成详情页的吞吐量（条/分钟），只按 fetch() 中的耗时计算"""
+        return self.completed * 60 / self.busy if self.busy > 0 else 0.0
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def _get(self, url):
+        self.rate_limiter.wait(url)
+        self.backoff.sleep()
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def _result(self, url, future):
+        """HTTP 下载的结果，下载失败时为 None"""
+        try:
+            return future.result()
+        except requests.RequestException as e:
+            print(f'详情页下载失败：{url} {e}')
+            return None
+
+    def _usable(self, page_source):
+        """下载成功、不是验证码页面且包含详情元素"""
+        return (page_source is not None and not is_blocked(page_source)
+                and any(marker in page_source for marker in DETAIL_MARKERS))
+
+    def _fetch_in_browser(self, pages):
+        """pages 为 [(url, HTTP 下载的结果)]，一次交给浏览器标签池并发打开，依次产出页面源码；
+        没有 fallback 时原样产出 HTTP 下载的结果"""
+        for _, page_source in pages:
+            if page_source is not None and is_blocked(page_source):
+                self.backoff.failed()
+        if self.fallback is None:
+            for _, page_source in pages:
+                yield page_source or ''
+            return
+        self.fallbacks += len(pages)
+        for _, page_source in self.fallback.fetch([url for url, _ in pages]):
+            yield page_source
+
+
+class _StubHandler(http.server.BaseHTTPRequestHandler):
+    """本地测试服务：/captcha 开头的路径返回验证码页面，/script 开头的路径返回需要脚本渲染的空页面，
+    其余路径依次返回 pages 中的页面"""
+    protocol_version = 'HTTP/1.1'  # 支持 keep-alive
+    pages = []
+    counter = 0
+
+    def do_GET(self):
+        if self.path.startswith('/captcha'):
+            body = '<html><body>captcha</body></html>'.encode('utf-8')
+        elif self.path.startswith('/script'):
+            body = '<html><body><div id="root"></div></body></html>'.encode('utf-8')
+        else:
+            body = self.pages[_StubHandler.counter % len(self.pages)]
+            _StubHandler.counter += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='用本地 HTTP 服务测试详情页 HTTP 抓取')
+    parser.add_argument('pages', nargs='*', help='保存的详情页文件，不指定时使用内置的示例详情页')
+    parser.add_argument('--count', type=int, default=40, help='抓取的页面数')
+    parser.add_argument('--workers', type=int, default=8, help='并发请求数')
+    args = parser.parse_args()
+
+    if args.pages:
+        _StubHandler.pages = [open(path, 'rb').read() for path in args.pages]
+    else:
+        _StubHandler.pages = [SAMPLE_DETAIL.encode('utf-8')]
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+
+    class _CountingFallback:
+        """代替浏览器标签池，记录交给浏览器的批次，返回空页面"""
+        def __init__(self):
+            self.batches = []
+
+        def fetch(self, urls):
+            self.batches.append(len(urls))
+            for url in urls:
+                yield url, ''
+
+    # 验证码页面和需要脚本渲染的页面夹在中间，应合并为一批交给浏览器
+    urls = [f'{base}/item.htm?id={i}' for i in range(args.count)]
+    urls[len(urls) // 3:len(urls) // 3] = [f'{base}/captcha?id=0']
+    urls[len(urls) * 2 // 3:len(urls) * 2 // 3] = [f'{base}/script?id=0']
+    fallback = _CountingFallback()
+    fetcher = HttpDetailFetcher(size=args.workers, backoff=Backoff(initial=0), fallback=fallback)
+    start = time.perf_counter()
+    results = [parse_detail(page_source) for _, page_source in fetcher.fetch(urls) if page_source]
+    elapsed = time.perf_counter() - start
+    print(f'抓取 {len(urls)} 个页面，耗时 {elapsed * 1000:.0f} ms，平均 {elapsed * 1000 / len(urls):.1f} ms/页，'
+          f'交给浏览器 {fetcher.fallbacks} 个（{len(fallback.batches)} 批）')
+    if results:
+        print(f'解析结果示例：{results[0]}')
+    if not args.pages:
+        assert fallback.batches == [2], fallback.batches
+        assert results == [SAMPLE_DETAIL_FIELDS] * args.count, results[:1]
+        print('示例详情页解析结果正确')
+    fetcher.close()
+    server.shutdown()
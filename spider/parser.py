@@ -0,0 +1,101 @@
+"""搜索结果页、详情页的解析（不依赖浏览器）
+
+使用 lxml 解析，XPath 预先编译，每个字段只查找一次。
+"""
+import re
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse
+
+from lxml import etree, html
+
+from spider.brand import classify_brand
+
+
+def _starts_with(tag, prefix):
+    """与 CSS 选择器 tag[class^="prefix"] 等价的 XPath（取第一个匹配）"""
+    return etree.XPath(f'(.//{tag}[starts-with(normalize-space(@class), "{prefix}")])[1]')
+
+
+# 商品链接中每次展示都会变化的跟踪参数，不参与商品的标识
+TRACKING_PARAMS = {'spm', 'scm', 'pvid', 'utparam', 'priceTId', 'abbucket', 'ns', 'xxc', 'ali_refid', 'ali_trackid'}
+
+CONTENT = etree.XPath('(//div[starts-with(normalize-space(@class), "content--")])[1]')
+ITEMS = etree.XPath('.//div[starts-with(normalize-space(@class), "tbpc-col")]')
+LINK = _starts_with('a', 'doubleCardWrapperAda')
+IMAGE = _starts_with('img', 'mainPic--')
+TITLE = _starts_with('div', 'title--')
+PRICE = _starts_with('div', 'innerPrice')
+SALES = _starts_with('span', 'realSales--')
+SHOP_NAME = _starts_with('span', 'shopNameText--')
+COMMENTS = _starts_with('span', 'tagItem--')
+STAR = _starts_with('span', 'starNum--')
+
+
+def _first(xpath, node):
+    found = xpath(node)
+    return found[0] if found else None
+
+
+def parse_count(text):
+    """销量、评论数文本转为数字字符串：'万' 换成 '0000' 后提取全部数字"""
+    text = text.replace('万', '0000')
+    return text, ''.join(re.findall(r'\d+', text))
+
+
+def item_id_from_url(url):
+    """从商品链接中取商品 id，没有 id 参数时用去掉跟踪参数（其余参数排序）的链接
+
+    详情页（item.htm）的链接去掉跟踪参数后没有其他参数时无法区分商品，返回 None。
+    """
+    parsed = urlparse(url)
+    ids = parse_qs(parsed.query).get('id')
+    if ids:
+        return ids[0]
+    params = sorted((name, value) for name, value in parse_qsl(parsed.query) if name not in TRACKING_PARAMS)
+    if params:
+        return f'{parsed.netloc}{parsed.path}?{urlencode(params)}'
+    if parsed.path.endswith('/item.htm'):
+        return None
+    return f'{parsed.netloc}{parsed.path}'
+
+
+def parse_items(page_source):
+    """解析搜索结果页，返回商品列表（不含详情页字段）"""
+    content = _first(CONTENT, html.fromstring(page_source))
+    if content is None:
+        return []
+    results = []
+    for item in ITEMS(content):
+        link = _first(LINK, item)
+        if link is None:
+            continue
+        url = 'https:' + link.get('href')
+        item_id = item_id_from_url(url)
+        if item_id is None:
+            continue  # 无法确定是哪个商品，写入时会与其他同类商品互相覆盖
+        image = _first(IMAGE, item)
+        title = _first(TITLE, item).text_content().strip()
+        # 整数与小数部分可能分行
+        price = re.sub(r'\s+', '', _first(PRICE, item).text_content())
+        sales = _first(SALES, item)
+        sales_text, sales = parse_count(sales.text_content() if sales is not None else '100')
+        results.append({
+            'item_id': item_id,
+            'url': url,
+            'img': image.get('src') if image is not None else '无',
+            'title': title,
+            'brand': classify_brand(title),
+            'price': price,
+            'sales_text': sales_text,
+            'sales': sales,
+            'shopname': _first(SHOP_NAME, item).text_content(),
+        })
+    return results
+
+
+def parse_detail(page_source):
+    """解析详情页，返回 (评论数文本, 评论数, 评分)"""
+    document = html.fromstring(page_source)
+    comments = _first(COMMENTS, document)
+    star = _first(STAR, document)
+    comments_count_text, comments_count = parse_count(comments.text_content() if comments is not None else '0')
+    return comments_count_text, comments_count, star.text_content() if star is not None else '3'
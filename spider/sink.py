@@ -0,0 +1,94 @@
+"""爬取结果写入：整个运行期间共用一个数据库连接和一个 CSV 文件，按页批量写入"""
+import csv
+import math
+import os.path
+import time
+
+from component.db import connect
+from component.schema import refresh_brand_sales_daily
+
+# 商品 id 和链接放在最后，再次导入时按商品 id 去重
+CSV_HEADER = ['img', 'title', 'brand', 'price', 'sales', 'shopname', 'comments_count_text', 'comments_count', 'star',
+              'item_id', 'url']
+
+# 按商品 id 写入：已存在的商品原地更新（导入的旧数据没有店铺时保留原有店铺）
+UPSERT_SQL = (
+    "INSERT INTO phone_sales (item_id, url, img, title, brand, price, sales_text, sales, shopname, "
+    "comments_count_text, comments_count, star) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (item_id) DO UPDATE SET url = excluded.url, img = excluded.img, title = excluded.title, "
+    "brand = excluded.brand, price = excluded.price, sales_text = excluded.sales_text, "
+    "sales = excluded.sales, shopname = COALESCE(excluded.shopname, shopname), "
+    "comments_count_text = excluded.comments_count_text, comments_count = excluded.comments_count, "
+    "star = excluded.star"
+)
+
+
+def _number(text, convert=float):
+    """页面上取到的数值文本转为数字，为空或格式不正确时返回 None（写入 NULL）"""
+    try:
+        value = convert(text)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+class SalesSink:
+    """缓冲写入器
+
+    add() 只把商品放进缓冲区，flush() 在一个事务里用 executemany 写入数据库（含销量快照）并追加到 CSV。
+    数据库按商品 id 做 UPSERT：已抓取过的商品原地更新，CSV 中同一次运行的重复商品只写一次。
+    作为上下文管理器使用时，正常结束、异常或 Ctrl+C 退出都会先写完缓冲区再关闭。
+    """
+    def __init__(self, db_path=None, csv_path="output.csv"):
+        # 与界面使用同一个数据库（WAL 模式，提交不阻塞界面读取）
+        self.connection = connect(db_path)
+
+        write_header = not os.path.exists(csv_path)
+        self.csv_file = open(csv_path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.csv_file)
+        if write_header:
+            self.writer.writerow(CSV_HEADER)
+        self.buffer = []
+        self.written_ids = set()  # 本次运行已写入 CSV 的商品 id
+
+    def add(self, item):
+        """缓存一个商品，item 为包含 phone_sales 各字段的字典"""
+        self.buffer.append(item)
+
+    def flush(self):
+        """在一个事务中写入缓冲区中的全部商品，同时追加销量快照并更新当天的品牌日销量"""
+        if not self.buffer:
+            return
+        rows = [(item['item_id'], item['url'], item['img'], item['title'], item['brand'], _number(item['price']),
+                 item['sales_text'], _number(item['sales'], int), item['shopname'],
+                 item['comments_count_text'], _number(item['comments_count'], int), _number(item['star']))
+                for item in self.buffer]
+        crawled_at = int(time.time())
+        with self.connection:
+            self.connection.executemany(UPSERT_SQL, rows)
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO sales_snapshot (item_id, crawled_at, sales, price_cents, comments_count) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(row[0], crawled_at, row[7], round(row[5] * 100) if row[5] is not None else None, row[10])
+                 for row in rows]
+            )
+            refresh_brand_sales_daily(self.connection.cursor(), time.strftime('%Y-%m-%d', time.localtime(crawled_at)))
+        for item in self.buffer:
+            if item['item_id'] not in self.written_ids:
+                self.written_ids.add(item['item_id'])
+                self.writer.writerow([item[field] for field in CSV_HEADER])
+        self.csv_file.flush()
+        self.buffer.clear()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.csv_file.close()
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
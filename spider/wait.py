@@ -0,0 +1,81 @@
+"""爬虫的等待层：等待具体的页面条件成立，只在检测到验证码或限流时才退避"""
+import time
+
+from selenium.common import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.wait import WebDriverWait
+
+RESULTS_CSS = 'div[class^="content--"] div[class^="tbpc-col"]'  # 搜索结果中的商品
+SALES_CSS = 'span[class^="realSales--"]'  # 商品销量
+BLOCKED_MARKERS = ('captcha', 'punish', '访问被拒绝')  # 验证码、限流页面的特征
+
+
+def wait_for(driver, locator, timeout=20, condition=EC.presence_of_element_located):
+    """等待 locator 满足 condition，返回元素，超时返回 None"""
+    print(f"定位元素：{locator[1]}")
+    try:
+        return WebDriverWait(driver, timeout).until(condition(locator))
+    except TimeoutException:
+        print(f'元素：{locator[1]}等待超时')
+        return None
+
+
+def wait_for_new_window(driver, old_count, timeout=20):
+    """等待打开新窗口，成功返回 True"""
+    try:
+        WebDriverWait(driver, timeout).until(lambda d: len(d.window_handles) > old_count)
+        return True
+    except TimeoutException:
+        return False
+
+
+def wait_for_results(driver, timeout=20):
+    """等待搜索结果及销量信息渲染出来，成功返回 True"""
+    return (wait_for(driver, (By.CSS_SELECTOR, RESULTS_CSS), timeout) is not None and
+            wait_for(driver, (By.CSS_SELECTOR, SALES_CSS), timeout) is not None)
+
+
+def wait_for_page_change(driver, old_item, timeout=20):
+    """翻页后等待旧的商品元素失效、新一页结果渲染出来，成功返回 True"""
+    try:
+        WebDriverWait(driver, timeout).until(EC.staleness_of(old_item))
+    except TimeoutException:
+        print('翻页等待超时')
+        return False
+    return wait_for_results(driver, timeout)
+
+
+def is_blocked(page_source):
+    """页面是否为验证码或限流页面"""
+    return any(marker in page_source for marker in BLOCKED_MARKERS)
+
+
+def wait_until_unblocked(driver, timeout=300):
+    """等待人工通过滑块验证，验证通过立即返回 True"""
+    print(f'检测到需要你手动操作过滑块，最多等待{timeout}秒')
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=1).until(lambda d: not is_blocked(d.page_source))
+        return True
+    except TimeoutException:
+        print('等待滑块验证超时')
+        return False
+
+
+class Backoff:
+    """自适应退避：检测到验证码或限流时延迟翻倍，之后每次正常请求减半直至为 0"""
+    def __init__(self, initial=2.0, maximum=60.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.delay = 0.0
+
+    def failed(self):
+        self.delay = min(self.maximum, self.delay * 2 if self.delay else self.initial)
+        print(f'触发退避，请求间隔调整为{self.delay:.1f}秒')
+
+    def succeeded(self):
+        self.delay = self.delay / 2 if self.delay >= self.initial else 0.0
+
+    def sleep(self):
+        if self.delay:
+            time.sleep(self.delay)